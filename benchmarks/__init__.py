@@ -0,0 +1,9 @@
+"""Benchmarks for the `open_intro` modules.
+
+Run each one from the root of the repository, e.g.
+
+    python -m benchmarks.bench_emails
+
+`benchmarks.suite` runs every stage of the workshop pipelines at several
+sizes and saves the timings to `benchmarks/results/` as JSON.
+"""
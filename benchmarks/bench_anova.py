@@ -0,0 +1,64 @@
+"""Time a one-way ANOVA of many DVs: open_intro.anova against ols + anova_lm per DV.
+
+    python -m benchmarks.bench_anova --dvs 10 100 1000 10000
+
+The DVs are random reaction times for the 24 participants and two
+conditions of `data/ANOVA_data1.csv`. The loop fits the workshop's
+`ols('RT ~ Condition')` and `anova_lm(typ=3)` once per DV, and is skipped
+above `--loop-max-dvs`. Where both run, the results are checked to agree to
+1e-10.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from statsmodels.formula.api import ols
+
+from open_intro.anova import mass_anova
+
+
+def loop(data, dvs):
+    tables = {}
+    for dv in dvs:
+        model = ols('%s ~ Condition' % dv, data=data).fit()
+        tables[dv] = sm.stats.anova_lm(model, typ=3)
+    return tables
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dvs', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--loop-max-dvs', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    condition = pd.read_csv('data/ANOVA_data1.csv')['Condition']
+    print('%8s %12s %12s' % ('DVs', 'loop', 'mass_anova'))
+    for count in args.dvs:
+        dvs = ['RT%d' % i for i in range(count)]
+        effects = rng.normal(0, 50, count)
+        values = rng.normal(1000, 100, (len(condition), count)) + np.outer(condition == 'Fast', effects)
+        data = pd.concat([condition, pd.DataFrame(values, columns=dvs)], axis=1)
+        fast, result = timed(mass_anova, data, 'Condition', dvs)
+        if count <= args.loop_max_dvs:
+            slow, expected = timed(loop, data, dvs)
+            for dv, table in expected.items():
+                mine = result.loc[dv].unstack().loc[table.index, table.columns]
+                assert np.allclose(mine, table, rtol=1e-10, atol=0, equal_nan=True), dv
+            slow = '%11.3fs' % slow
+        else:
+            slow = '%12s' % 'skipped'
+        print('%8d %s %11.4fs' % (count, slow, fast))
+
+
+if __name__ == '__main__':
+    main()
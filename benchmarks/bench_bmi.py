@@ -0,0 +1,72 @@
+"""Time to work out the BMI of a cohort: open_intro.vital_stats.bmi against the workshop loop.
+
+    python -m benchmarks.bench_bmi --people 1000 1000000 10000000
+
+Both start from arrays of weights, heights and names. The workshop loop
+builds `vital_stats` the way the workshop does and calls `bmi` once per
+person; the times include building that array.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from open_intro.vital_stats import bmi, bmi_report, make_vital_stats
+
+
+def workshop_bmi(weight, height):
+    bmi_value = weight/(height*height)
+    return bmi_value
+
+
+def workshop_loop(weights, heights, names):
+    vital_stats = np.array((weights, heights, names))
+    values = []
+    for person in vital_stats.T:
+        weight = float(person[0])
+        height = float(person[1])
+        values.append(workshop_bmi(weight, height))
+    return values
+
+
+def make_cohort(people, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = rng.normal(75, 12, people).round(1)
+    heights = rng.normal(1.72, 0.09, people).round(2)
+    names = np.char.add('participant', np.arange(people).astype(str))
+    return weights, heights, names
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--people', type=int, nargs='+', default=[1000, 1000000, 10000000])
+    parser.add_argument('--loop-max-people', type=int, default=1000000,
+                        help='skip the workshop loop above this many people; its array of '
+                             'strings takes about 4 GB for 1e7 people')
+    args = parser.parse_args()
+
+    print('%10s %15s %15s %15s' % ('people', 'workshop loop', 'bmi', 'bmi_report'))
+    for people in args.people:
+        weights, heights, names = make_cohort(people)
+        fast, values = timed(bmi, weights, heights)
+        stats = make_vital_stats(names, weights, heights)
+        report = timed(lambda: sum(1 for _ in bmi_report(stats)))[0]
+        if people <= args.loop_max_people:
+            slow, expected = timed(workshop_loop, weights, heights, names)
+            # The workshop loop goes through strings, which hold the numbers exactly.
+            assert np.array_equal(np.array(expected), values)
+            slow = '%14.3fs' % slow
+        else:
+            slow = '%15s' % 'skipped'
+        print('%10d %s %14.4fs %14.3fs' % (people, slow, fast, report))
+
+
+if __name__ == '__main__':
+    main()
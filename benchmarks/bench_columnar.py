@@ -0,0 +1,68 @@
+"""Load time and memory of the workshop data files: load_csv against read_csv.
+
+    python -m benchmarks.bench_columnar --rows 1000000
+
+Each file in `data/` is scaled up to about `--rows` rows by repeating it
+with new subject numbers and jittered numbers. The load_csv times are for
+loading the columnar copy once it has been made; the time to make it is
+shown separately.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from open_intro.columnar import load_csv
+
+FILES = ['ANOVA_data1.csv', 'ANOVA_data3.csv', 'ANOVA_challenge.csv', 'brain_injury_data.csv']
+SUBJECT_COLUMNS = ('Subject', 'participant')
+
+
+def scale_up(source, path, rows, seed=0):
+    """Write `source` repeated to about `rows` rows to `path`."""
+    rng = np.random.default_rng(seed)
+    data = pd.read_csv(source)
+    copies = max(1, rows // len(data))
+    scaled = pd.DataFrame({name: np.tile(column.to_numpy(), copies) for name, column in data.items()})
+    for name, column in data.items():
+        if name in SUBJECT_COLUMNS:
+            scaled[name] += np.repeat(np.arange(copies), len(data)) * column.max()
+        elif pd.api.types.is_integer_dtype(column):
+            scaled[name] += rng.integers(-50, 50, len(scaled))
+        elif pd.api.types.is_float_dtype(column):
+            scaled[name] *= rng.uniform(0.9, 1.1, len(scaled))
+    scaled.to_csv(path, index=False)
+    return len(scaled)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--data', default='data')
+    args = parser.parse_args()
+
+    print('%-22s %9s %20s %10s %20s' % ('file', 'rows', 'read_csv', 'convert', 'load_csv'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in FILES:
+            path = os.path.join(tmp, name)
+            rows = scale_up(os.path.join(args.data, name), path, args.rows)
+            slow, data = timed(pd.read_csv, path)
+            convert = timed(load_csv, path)[0]
+            fast, compact = timed(load_csv, path)
+            print('%-22s %9d %8.3fs %8.1f MB %9.3fs %8.4fs %8.1f MB' % (
+                name, rows, slow, data.memory_usage(deep=True).sum() / 1e6, convert,
+                fast, compact.memory_usage(deep=True).sum() / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Time all pairwise paired t-tests: open_intro.contrasts against masks and ttest_rel per pair.
+
+    python -m benchmarks.bench_contrasts --subjects 1000
+
+For each design, every subject has one RT in every cell of a long-format
+frame shaped like `data/ANOVA_data3.csv`. The loop picks out the two cells
+of each pair with boolean masks and calls `stats.ttest_rel`, as the
+workshop does for its two follow-up tests. The t values are checked to
+agree to 1e-10.
+"""
+
+import argparse
+import time
+from itertools import combinations, product
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from open_intro.contrasts import paired_contrasts
+
+DESIGNS = [(2, 2), (4, 4), (6, 3)]
+
+
+def make_data(levels, subjects, rng):
+    cells = list(product(*(['L%d' % i for i in range(n)] for n in levels)))
+    factors = ['F%d' % i for i in range(len(levels))]
+    data = pd.DataFrame(np.repeat(cells, subjects, axis=0), columns=factors)
+    data.insert(0, 'Subject', np.tile(np.arange(subjects), len(cells)))
+    data['RT'] = rng.normal(1000, 100, len(data)) + np.repeat(rng.normal(0, 20, len(cells)), subjects)
+    return data, factors, cells
+
+
+def loop(data, factors, cells):
+    results = []
+    for a, b in combinations(cells, 2):
+        index_a = np.logical_and.reduce([data[factor] == level for factor, level in zip(factors, a)])
+        index_b = np.logical_and.reduce([data[factor] == level for factor, level in zip(factors, b)])
+        results.append(stats.ttest_rel(data[index_a]['RT'], data[index_b]['RT']).statistic)
+    return results
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subjects', type=int, nargs='+', default=[1000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print('%8s %9s %10s %12s %18s' % ('design', 'subjects', 'contrasts', 'loop', 'paired_contrasts'))
+    for subjects in args.subjects:
+        for levels in DESIGNS:
+            data, factors, cells = make_data(levels, subjects, rng)
+            slow, expected = timed(loop, data, factors, cells)
+            fast, result = timed(paired_contrasts, data, 'RT', 'Subject', factors)
+            assert np.allclose(result['t'], expected, rtol=1e-10, atol=0)
+            print('%8s %9d %10d %11.3fs %17.4fs' % (' x '.join(map(str, levels)), subjects, len(result),
+                                                    slow, fast))
+
+
+if __name__ == '__main__':
+    main()
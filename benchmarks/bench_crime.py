@@ -0,0 +1,105 @@
+"""Time and peak memory of reading the crime dataset: read_crime_data against the workshop's steps.
+
+Each method reads a synthetic `crime_dataset.csv` with `--rows` rows in a
+fresh process, so that its peak resident set size (`ru_maxrss`) is
+measured on its own.
+
+    python -m benchmarks.bench_crime --rows 10000000
+
+The workshop's `str.split(expand=True,)` fails on cities with a space in
+their name, so the baseline splits at the last comma with
+`str.rsplit(', ', n=1, expand=True)`, which goes through the same string
+machinery.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from open_intro.crime import read_crime_data
+
+PLACES = [
+    'Albuquerque, NM', 'Arlington, TX', 'Atlanta, GA', 'Austin, TX', 'Baltimore, MD', 'Boston, MA',
+    'Charlotte, NC', 'Chicago, IL', 'Cleveland, OH', 'Colorado Springs, CO', 'Columbus, OH', 'Dallas, TX',
+    'Denver, CO', 'Detroit, MI', 'El Paso, TX', 'Fort Worth, TX', 'Fresno, CA', 'Honolulu, HI',
+    'Houston, TX', 'Indianapolis, IN', 'Jacksonville, FL', 'Kansas City, MO', 'Las Vegas, NV',
+    'Long Beach, CA', 'Los Angeles, CA', 'Louisville, KY', 'Memphis, TN', 'Miami, FL', 'Milwaukee, WI',
+    'Minneapolis, MN', 'Nashville, TN', 'New Orleans, LA', 'New York, NY', 'Newark, NJ', 'Oakland, CA',
+    'Oklahoma City, OK', 'Omaha, NE', 'Philadelphia, PA', 'Phoenix, AZ', 'Portland, OR', 'Sacramento, CA',
+    'Salt Lake City, UT', 'San Antonio, TX', 'San Diego, CA', 'San Francisco, CA', 'San Jose, CA',
+    'Seattle, WA', 'St. Louis, MO', 'Tampa, FL', 'Tucson, AZ', 'Tulsa, OK', 'Virginia Beach, VA',
+    'Washington, DC', 'Wichita, KS',
+]
+CRIMES = ['Violent Crimes', 'Homicides', 'Rapes', 'Assaults', 'Robberies']
+
+
+def make_crime_data(path, rows, seed=0, chunk=1000000):
+    """Write a synthetic `crime_dataset.csv` with `rows` rows to `path`."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk):
+        size = min(chunk, rows - start)
+        population = rng.lognormal(13.5, 0.7, size).round()
+        data = pd.DataFrame({
+            'Year': (1975 + np.arange(start, start + size) // len(PLACES) % 41).astype(float),
+            'index_nsa': rng.uniform(20, 300, size).round(3),
+            'City, State': np.array(PLACES)[np.arange(start, start + size) % len(PLACES)],
+            'Population': population,
+        })
+        for crime, rate in zip(CRIMES, [0.01, 0.0002, 0.0005, 0.005, 0.004]):
+            data[crime] = rng.poisson(population * rate).astype(float)
+        data.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+def workshop_steps(path):
+    crime_data = pd.read_csv(path)
+    crime_data.rename(columns={'City, State': 'City_State'}, inplace=True)
+    crime_data[['City', 'State']] = crime_data.City_State.str.rsplit(', ', n=1, expand=True)
+    crime_data = crime_data.drop('City_State', axis=1)
+    crime_data.rename(columns={'Violent Crimes': 'Violent_Crimes', 'index_nsa': 'house_prices'}, inplace=True)
+    return crime_data
+
+
+METHODS = {
+    'read_csv + rename + str.rsplit': workshop_steps,
+    'read_crime_data': read_crime_data,
+}
+
+
+def child(method, path):
+    start = time.perf_counter()
+    METHODS[method](path)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(peak_kb, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--child', nargs=2, metavar=('METHOD', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(*args.child)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'crime_dataset.csv')
+        make_crime_data(path, args.rows)
+        print('%d rows, %.0f MB' % (args.rows, os.path.getsize(path) / 1e6))
+        print('%-32s %12s %8s' % ('method', 'peak RSS MB', 'seconds'))
+        for method in METHODS:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_crime', '--child', method, path],
+                check=True, capture_output=True, text=True).stdout
+            peak_kb, elapsed = output.split()
+            print('%-32s %12.1f %8.2f' % (method, int(peak_kb) / 1024, float(elapsed)))
+
+
+if __name__ == '__main__':
+    main()
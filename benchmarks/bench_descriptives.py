@@ -0,0 +1,75 @@
+"""Time and peak memory of descriptives by group: describe_csv against read_csv + groupby.
+
+Each method runs in a fresh process so that its peak resident set size
+(`ru_maxrss`) is measured on its own.
+
+    python -m benchmarks.bench_descriptives --trials 20000000
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from open_intro.descriptives import describe_csv
+
+
+def make_rt_log(path, trials, seed=0, chunk=1000000):
+    """Write a synthetic log of `trials` reaction times from an online experiment to `path`."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, trials, chunk):
+        size = min(chunk, trials - start)
+        condition = rng.choice(['high', 'low'], size)
+        pd.DataFrame({
+            'Subject': start // 200 + np.arange(size) // 200,
+            'Session': rng.integers(1, 4, size),
+            'Trial': np.arange(start, start + size) % 200 + 1,
+            'Item': np.char.add('item', rng.integers(0, 400, size).astype(str)),
+            'Condition': condition,
+            'RT': np.where(condition == 'high', 860, 1180) + rng.normal(0, 80, size).round(1),
+        }).to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+METHODS = {
+    'read_csv + groupby': lambda path: pd.read_csv(path).groupby(['Condition'])['RT'].agg(['count', 'mean', 'std']),
+    'describe_csv': lambda path: describe_csv(path, 'RT', 'Condition'),
+}
+
+
+def child(method, path):
+    start = time.perf_counter()
+    METHODS[method](path)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(peak_kb, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trials', type=int, default=20000000)
+    parser.add_argument('--child', nargs=2, metavar=('METHOD', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(*args.child)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rt_log.csv')
+        make_rt_log(path, args.trials)
+        print('%d trials, %.0f MB' % (args.trials, os.path.getsize(path) / 1e6))
+        print('%-20s %12s %8s' % ('method', 'peak RSS MB', 'seconds'))
+        for method in METHODS:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_descriptives', '--child', method, path],
+                check=True, capture_output=True, text=True).stdout
+            peak_kb, elapsed = output.split()
+            print('%-20s %12.1f %8.2f' % (method, int(peak_kb) / 1024, float(elapsed)))
+
+
+if __name__ == '__main__':
+    main()
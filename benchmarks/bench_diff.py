@@ -0,0 +1,120 @@
+"""Time to make an HTML diff: open_intro.diff.HtmlDiff against difflib.HtmlDiff.
+
+    python -m benchmarks.bench_diff --lines 1000 10000 100000
+
+With `--memory`, compares peak memory and output size of building the whole
+file with `make_file` against streaming it with `diff_files`, with and
+without `--context`.
+"""
+
+import argparse
+import difflib
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from open_intro.diff import HtmlDiff, diff_files
+
+WORDS = ('explanation cognitive processes categorization generalization learning '
+         'understanding semantic pragmatic processing research participants '
+         'experiment condition reaction time effect analysis model data').split()
+
+
+def make_sentence(rng, words=None):
+    return ' '.join(rng.choice(WORDS) for _ in range(words or rng.randrange(8, 16))) + '\n'
+
+
+def make_documents(lines, changed=0.01, seed=0):
+    """Return two versions of a document of `lines` lines, about a fraction `changed` edited.
+
+    Half of the edits touch a single line and half rewrite a paragraph of up
+    to 40 lines, as happens when a section of a report is redrafted.
+    """
+    rng = random.Random(seed)
+    fromlines = [make_sentence(rng) for _ in range(lines)]
+    tolines = list(fromlines)
+    edited = 0
+    while edited < max(1, lines * changed):
+        where = rng.randrange(len(tolines))
+        edit = rng.randrange(4)
+        if edit == 0:
+            del tolines[where]
+        elif edit == 1:
+            tolines.insert(where, make_sentence(rng))
+        elif edit == 2:
+            words = tolines[where].split()
+            words[rng.randrange(len(words))] = rng.choice(WORDS)
+            tolines[where] = ' '.join(words) + '\n'
+        else:
+            size = rng.randrange(10, 40)
+            tolines[where:where + size] = [make_sentence(rng) for _ in range(rng.randrange(10, 40))]
+            edited += size - 1
+        edited += 1
+    return fromlines, tolines
+
+
+def timed(differ, fromlines, tolines):
+    start = time.perf_counter()
+    differ.make_file(fromlines, tolines, 'file1', 'file2')
+    return time.perf_counter() - start
+
+
+def make_file_in_memory(file1, file2, path):
+    with open(file1) as f:
+        fromlines = f.readlines()
+    with open(file2) as f:
+        tolines = f.readlines()
+    diff = HtmlDiff().make_file(fromlines, tolines, file1, file2)
+    with open(path, 'w') as f:
+        f.write(diff)
+
+
+def memory(sizes):
+    print('%8s %-22s %10s %10s' % ('lines', 'method', 'peak MB', 'output MB'))
+    methods = [
+        ('make_file', make_file_in_memory),
+        ('diff_files', lambda file1, file2, path: diff_files(file1, file2, path)),
+        ('diff_files --context', lambda file1, file2, path: diff_files(file1, file2, path, True)),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        file1, file2, path = (os.path.join(tmp, name) for name in ('file1', 'file2', 'diff.html'))
+        for lines in sizes:
+            fromlines, tolines = make_documents(lines)
+            with open(file1, 'w') as f:
+                f.writelines(fromlines)
+            with open(file2, 'w') as f:
+                f.writelines(tolines)
+            del fromlines, tolines
+            for name, method in methods:
+                tracemalloc.start()
+                method(file1, file2, path)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print('%8d %-22s %10.1f %10.1f' % (lines, name, peak / 1e6, os.path.getsize(path) / 1e6))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--difflib-max-lines', type=int, default=10000,
+                        help='skip difflib above this many lines, it takes minutes')
+    parser.add_argument('--memory', action='store_true')
+    args = parser.parse_args()
+    if args.memory:
+        return memory(args.lines)
+
+    print('%8s %18s %18s' % ('lines', 'difflib.HtmlDiff', 'HtmlDiff'))
+    for lines in args.lines:
+        fromlines, tolines = make_documents(lines)
+        fast = timed(HtmlDiff(), fromlines, tolines)
+        if lines <= args.difflib_max_lines:
+            slow = '%17.2fs' % timed(difflib.HtmlDiff(), fromlines, tolines)
+        else:
+            slow = '%18s' % 'skipped'
+        print('%8d %s %17.2fs' % (lines, slow, fast))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Time to diff two releases of a document tree where most files are unchanged.
+
+    python -m benchmarks.bench_diff_trees --files 400 --lines 5000 --changed 0.05
+
+Compares running `diff_files` on every pair of files, as the workshop script
+would be run by hand, against `diff_trees`, which skips the pairs whose
+contents hash the same and diffs the rest in worker processes.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_diff import make_documents
+from open_intro.diff import diff_files, diff_trees
+
+
+def make_trees(root, files, lines, changed, seed=0):
+    """Write two versions of a tree of `files` documents, a fraction `changed` of them edited."""
+    rng = random.Random(seed)
+    dir1, dir2 = os.path.join(root, 'release1'), os.path.join(root, 'release2')
+    for i in range(files):
+        name = os.path.join('chapter%02d' % (i % 20), 'section%04d.txt' % i)
+        fromlines, tolines = make_documents(lines, seed=seed + i)
+        if rng.random() >= changed:
+            tolines = fromlines
+        for directory, content in ((dir1, fromlines), (dir2, tolines)):
+            os.makedirs(os.path.dirname(os.path.join(directory, name)), exist_ok=True)
+            with open(os.path.join(directory, name), 'w') as f:
+                f.writelines(content)
+    return dir1, dir2
+
+
+def every_pair(dir1, dir2, output):
+    os.makedirs(output, exist_ok=True)
+    for root, _, names in os.walk(dir1):
+        for name in names:
+            file1 = os.path.join(root, name)
+            file2 = os.path.join(dir2, os.path.relpath(file1, dir1))
+            diff_files(file1, file2, os.path.join(output, name + '.html'))
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=400)
+    parser.add_argument('--lines', type=int, default=5000)
+    parser.add_argument('--changed', type=float, default=0.05,
+                        help='fraction of files edited between the two releases')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dir1, dir2 = make_trees(tmp, args.files, args.lines, args.changed)
+        print('%d files of %d lines, %.0f%% changed' % (args.files, args.lines, args.changed * 100))
+        print('%-28s %8s' % ('method', 'time'))
+        print('%-28s %7.2fs' % ('diff_files on every pair', timed(every_pair, dir1, dir2,
+                                                                 os.path.join(tmp, 'every'))))
+        for workers in sorted({1, os.cpu_count()}):
+            seconds = timed(diff_trees, dir1, dir2, os.path.join(tmp, 'trees%d' % workers), workers)
+            print('%-28s %7.2fs' % ('diff_trees, %d workers' % workers, seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Time to work out effect sizes: open_intro.effect_sizes against a loop over experiments.
+
+    python -m benchmarks.bench_effect_sizes --comparisons 1000 100000
+
+For summary statistics, the loop calls a scalar version of the same
+calculation once per comparison, as the workshop does with `cohen_d`. For
+raw data, it picks out the two groups of each experiment and summarises
+them one experiment at a time.
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from open_intro.effect_sizes import effect_sizes, effect_sizes_from_data
+
+
+def scalar_effect_sizes(mean1, mean2, sd1, sd2, n1, n2, z):
+    sd = math.sqrt(((n1 - 1) * sd1 ** 2 + (n2 - 1) * sd2 ** 2) / (n1 + n2 - 2))
+    d = (mean1 - mean2) / sd
+    se = math.sqrt((n1 + n2) / (n1 * n2) + d ** 2 / (2 * (n1 + n2)))
+    df = n1 + n2 - 2
+    j = math.exp(math.lgamma(df / 2) - math.lgamma((df - 1) / 2)) / math.sqrt(df / 2)
+    return d, d - z * se, d + z * se, d * j, (d - z * se) * j, (d + z * se) * j
+
+
+def loop(means, sds, ns):
+    z = stats.norm.ppf(0.975)
+    return [scalar_effect_sizes(m[0], m[1], s[0], s[1], n[0], n[1], z)
+            for m, s, n in zip(means.tolist(), sds.tolist(), ns.tolist())]
+
+
+def loop_from_data(data):
+    results = []
+    for experiment in data['Experiment'].unique():
+        scores = data[data['Experiment'] == experiment]
+        a = scores.loc[scores['Group'] == 'a', 'Score']
+        b = scores.loc[scores['Group'] == 'b', 'Score']
+        results.append(scalar_effect_sizes(a.mean(), b.mean(), a.std(), b.std(), len(a), len(b),
+                                           stats.norm.ppf(0.975)))
+    return results
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--comparisons', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--scores-per-group', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print('%12s %-14s %10s %14s' % ('comparisons', 'input', 'loop', 'effect_sizes'))
+    for comparisons in args.comparisons:
+        means = rng.normal(500, 20, (comparisons, 2))
+        sds = rng.uniform(5, 15, (comparisons, 2))
+        ns = rng.integers(10, 100, (comparisons, 2))
+        slow, expected = timed(loop, means, sds, ns)
+        fast, result = timed(effect_sizes, means, sds, ns)
+        assert np.allclose(np.array(expected), result.to_numpy())
+        print('%12d %-14s %9.3fs %13.3fs' % (comparisons, 'summaries', slow, fast))
+
+        scores = args.scores_per_group
+        data = pd.DataFrame({
+            'Experiment': np.repeat(np.arange(comparisons), 2 * scores),
+            'Group': np.tile(np.repeat(['a', 'b'], scores), comparisons),
+            'Score': rng.normal(500, 20, comparisons * 2 * scores),
+        })
+        if comparisons <= 10000:
+            slow = '%9.3fs' % timed(loop_from_data, data)[0]
+        else:
+            slow = '%10s' % 'skipped'
+        fast = timed(effect_sizes_from_data, data, 'Score', 'Group', 'Experiment')[0]
+        print('%12d %-14s %s %13.3fs' % (comparisons, 'raw scores', slow, fast))
+
+
+if __name__ == '__main__':
+    main()
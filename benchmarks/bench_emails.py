@@ -0,0 +1,78 @@
+"""Throughput of the school email extractor against the workshop loop.
+
+    python -m benchmarks.bench_emails --size-mb 256
+"""
+
+import argparse
+import csv
+import os
+import random
+import re
+import tempfile
+import time
+
+from open_intro.emails import extract_emails
+
+REGIONS = ['hackney', 'camden', 'islington', 'lambeth', 'leeds', 'kent', 'devon', 'york']
+
+
+def make_school_csv(path, size_mb, seed=0, regions=REGIONS):
+    """Write a synthetic schools export of roughly `size_mb` MB to `path`."""
+    rng = random.Random(seed)
+    target = size_mb * 1_000_000
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['URN', 'EstablishmentName', 'LA', 'Street', 'Town', 'Postcode',
+                         'TelephoneNum', 'Email'])
+        urn = 100000
+        while file.tell() < target:
+            urn += 1
+            region = rng.choice(regions)
+            school = 'school%d' % rng.randrange(100000)
+            writer.writerow([urn, '%s Primary School' % school.title(), region.title(),
+                             '%d High Street' % rng.randrange(1, 300), region.title(),
+                             'N%d %dAB' % (rng.randrange(1, 20), rng.randrange(1, 9)),
+                             '020 %04d %04d' % (rng.randrange(10000), rng.randrange(10000)),
+                             'admin@%s.%s.sch.uk' % (school, region)])
+
+
+def workshop_loop(path):
+    """The Problem 2 loop from boring.ipynb, collecting instead of printing."""
+    found = []
+    with open(path, mode='r') as csv_file:
+        csv_reader = csv.reader(csv_file)
+        for row in csv_reader:
+            to_search = ','.join(row)
+            patterns = re.findall(r'([A-Za-z0-9.-]+@[A-Za-z0-9.-]+.(hackney|camden).sch.uk)', to_search)
+            for pattern in patterns:
+                found.append(pattern[0])
+    return found
+
+
+def throughput(function, path):
+    size = os.path.getsize(path) / 1e6
+    start = time.perf_counter()
+    result = function(path)
+    elapsed = time.perf_counter() - start
+    return size / elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'school_data.csv')
+        make_school_csv(path, args.size_mb)
+        print('synthetic export: %.0f MB' % (os.path.getsize(path) / 1e6))
+
+        rate, loop_result = throughput(workshop_loop, path)
+        print('workshop loop       %8.1f MB/s' % rate)
+        rate, fast_result = throughput(lambda p: list(extract_emails(p)), path)
+        print('extract_emails      %8.1f MB/s' % rate)
+        assert fast_result == list(dict.fromkeys(loop_result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Peak memory of the email extractors as the export grows.
+
+Each extractor runs in a fresh process so that its peak resident set size
+(`ru_maxrss`) is measured on its own.
+
+    python -m benchmarks.bench_emails_memory --sizes-mb 256 1024 4096
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_emails import REGIONS, make_school_csv, workshop_loop
+from open_intro.emails import compile_pattern, extract_emails, iter_matches, scan_mmap
+
+
+def read_whole_file(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    return sum(1 for _ in iter_matches(data, compile_pattern(REGIONS)))
+
+
+METHODS = {
+    'workshop loop': workshop_loop,
+    'read whole file': read_whole_file,
+    'extract_emails': lambda path: sum(1 for _ in extract_emails(path, REGIONS, unique=False)),
+    'scan_mmap': lambda path: sum(1 for _ in scan_mmap(path, REGIONS)),
+}
+
+
+def child(method, path):
+    start = time.perf_counter()
+    METHODS[method](path)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(peak_kb, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes-mb', type=int, nargs='+', default=[64, 256, 1024])
+    parser.add_argument('--child', nargs=2, metavar=('METHOD', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(*args.child)
+
+    print('%-16s %8s %12s %8s' % ('method', 'size MB', 'peak RSS MB', 'seconds'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes_mb:
+            path = os.path.join(tmp, 'school_data.csv')
+            make_school_csv(path, size)
+            for method in METHODS:
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.bench_emails_memory', '--child', method, path],
+                    check=True, capture_output=True, text=True).stdout
+                peak_kb, elapsed = output.split()
+                print('%-16s %8d %12.1f %8.2f' % (method, size, int(peak_kb) / 1024, float(elapsed)))
+
+
+if __name__ == '__main__':
+    main()
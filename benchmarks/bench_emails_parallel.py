@@ -0,0 +1,47 @@
+"""Speedup of the sharded, multi-process email extractor.
+
+    python -m benchmarks.bench_emails_parallel --size-mb 512 --files 4
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_emails import REGIONS, make_school_csv
+from open_intro.emails import extract_emails, extract_emails_parallel, first_seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=128, help='size of each file')
+    parser.add_argument('--files', type=int, default=2)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(tmp, 'school_data_%d.csv' % i)
+            make_school_csv(path, args.size_mb, seed=i)
+            paths.append(path)
+        total = sum(os.path.getsize(path) for path in paths) / 1e6
+        print('%d files, %.0f MB in total, %d CPUs' % (len(paths), total, os.cpu_count()))
+
+        start = time.perf_counter()
+        serial = list(first_seen(email for path in paths
+                                 for email in extract_emails(path, REGIONS, unique=False)))
+        baseline = time.perf_counter() - start
+        print('serial      %7.2f s  %8.1f MB/s' % (baseline, total / baseline))
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            parallel = list(extract_emails_parallel(paths, REGIONS, workers=workers))
+            elapsed = time.perf_counter() - start
+            assert parallel == serial
+            print('%2d workers  %7.2f s  %8.1f MB/s  %5.2fx'
+                  % (workers, elapsed, total / elapsed, baseline / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Cost of matching more regions: prefix tree against one flat alternation.
+
+    python -m benchmarks.bench_emails_regions --size-mb 64
+"""
+
+import argparse
+import os
+import re
+import tempfile
+import time
+
+from benchmarks.bench_emails import make_school_csv
+from open_intro.emails import compile_pattern, iter_matches
+
+# Slugs in the style of the `<school>.<authority>.sch.uk` domains, one per
+# English local authority.
+LOCAL_AUTHORITIES = '''
+barking barnet bexley brent bromley camden croydon ealing enfield greenwich hackney hammersmith
+haringey harrow havering hillingdon hounslow islington kensington kingston lambeth lewisham merton
+newham redbridge richmond southwark sutton towerhamlets walthamforest wandsworth westminster
+cityoflondon barnsley bolton bradford bury calderdale doncaster gateshead kirklees knowsley leeds
+liverpool manchester newcastle northtyneside oldham rochdale rotherham salford sandwell sefton
+sheffield solihull southtyneside sthelens stockport sunderland tameside trafford wakefield walsall
+wigan wirral wolverhampton birmingham coventry dudley bedford centralbedfordshire luton
+bracknell reading slough westberks windsor wokingham buckinghamshire miltonkeynes cambridgeshire
+peterborough cheshireeast cheshirewest halton warrington cornwall scilly cumbria derby derbyshire
+devon plymouth torbay dorset bournemouth poole durham darlington hartlepool middlesbrough
+redcar stockton eastsussex brighton essex southend thurrock gloucestershire southglos bristol
+bathnes northsomerset somerset hampshire portsmouth southampton isleofwight herefordshire
+hertfordshire kent medway lancashire blackburn blackpool leicestershire leicester rutland
+lincolnshire northlincs nelincs norfolk northyorks york eastriding hull northants nottinghamshire
+nottingham oxfordshire shropshire telford staffordshire stoke suffolk surrey warwickshire
+westsussex wiltshire swindon worcestershire northumberland
+'''.split()
+
+
+def compile_alternation(regions):
+    """The workshop approach: every region spelled out in one regex."""
+    alternation = b'|'.join(re.escape(region.encode('ascii')) for region in regions)
+    return re.compile(rb'@[A-Za-z0-9.-]+\.(?:' + alternation + rb')\.sch\.uk')
+
+
+def timed_scan(data, pattern):
+    start = time.perf_counter()
+    spans = list(iter_matches(data, pattern))
+    return time.perf_counter() - start, spans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'school_data.csv')
+        make_school_csv(path, args.size_mb, regions=LOCAL_AUTHORITIES)
+        with open(path, 'rb') as file:
+            data = file.read()
+    size = len(data) / 1e6
+
+    print('%7s %9s %17s %17s' % ('regions', 'matches', 'alternation MB/s', 'prefix tree MB/s'))
+    for count in (2, 20, len(LOCAL_AUTHORITIES)):
+        regions = LOCAL_AUTHORITIES[:count]
+        naive_time, naive_spans = timed_scan(data, compile_alternation(regions))
+        tree_time, tree_spans = timed_scan(data, compile_pattern(regions))
+        assert naive_spans == tree_spans
+        print('%7d %9d %17.1f %17.1f' % (count, len(tree_spans), size / naive_time, size / tree_time))
+
+
+if __name__ == '__main__':
+    main()
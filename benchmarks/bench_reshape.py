@@ -0,0 +1,86 @@
+"""Time and peak memory of reshaping ANOVA_challenge.csv: open_intro.reshape against melt + str.split.
+
+Each method reads a copy of `data/ANOVA_challenge.csv` with `--participants`
+rows and runs in a fresh process, so that its peak resident set size
+(`ru_maxrss`) is measured on its own.
+
+    python -m benchmarks.bench_reshape --participants 1000000
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from open_intro.anova import rm_anova
+from open_intro.reshape import rm_anova_wide, wide_to_long
+
+FACTORS = ['Prime', 'Target']
+
+
+def make_challenge(path, participants, seed=0, chunk=1000000):
+    """Write a synthetic `ANOVA_challenge.csv` with `participants` rows to `path`."""
+    rng = np.random.default_rng(seed)
+    columns = pd.read_csv('data/ANOVA_challenge.csv', nrows=0).columns
+    for start in range(0, participants, chunk):
+        size = min(chunk, participants - start)
+        data = pd.DataFrame(rng.normal(1550, 50, (size, 4)), columns=columns[1:])
+        data.insert(0, columns[0], np.arange(start, start + size) + 1)
+        data.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+def melt_and_split(path):
+    data = pd.read_csv(path).melt(id_vars='participant', var_name='cell', value_name='RT')
+    data[FACTORS] = data['cell'].str.split('_', expand=True)
+    data['Prime'] = data['Prime'].str.replace('prime', '')
+    data['Target'] = data['Target'].str.replace('target', '')
+    return data.drop(columns='cell')
+
+
+METHODS = {
+    'read_csv only': lambda path: pd.read_csv(path),
+    'melt + str.split': melt_and_split,
+    'wide_to_long': lambda path: wide_to_long(pd.read_csv(path), 'participant', FACTORS),
+    'wide_to_long + rm_anova': lambda path: rm_anova(wide_to_long(pd.read_csv(path), 'participant', FACTORS),
+                                                     'RT', 'participant', FACTORS),
+    'rm_anova_wide': lambda path: rm_anova_wide(pd.read_csv(path), 'participant', FACTORS),
+}
+
+
+def child(method, path):
+    start = time.perf_counter()
+    METHODS[method](path)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(peak_kb, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--participants', type=int, default=1000000)
+    parser.add_argument('--child', nargs=2, metavar=('METHOD', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(*args.child)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ANOVA_challenge.csv')
+        make_challenge(path, args.participants)
+        print('%d participants, %.0f MB' % (args.participants, os.path.getsize(path) / 1e6))
+        print('%-24s %12s %8s' % ('method', 'peak RSS MB', 'seconds'))
+        for method in METHODS:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_reshape', '--child', method, path],
+                check=True, capture_output=True, text=True).stdout
+            peak_kb, elapsed = output.split()
+            print('%-24s %12.1f %8.2f' % (method, int(peak_kb) / 1024, float(elapsed)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Time bootstrapped repeated-measures ANOVAs: open_intro.anova against AnovaRM per resample.
+
+    python -m benchmarks.bench_rm_anova --resamples 10 100 1000 10000
+
+Each resample draws the subjects of `data/ANOVA_data3.csv` with
+replacement. The loop builds the long-format frame of each resample and
+fits `AnovaRM(depvar='RT', within=['Prime', 'Target'], subject='Subject')`,
+as the workshop does once, and is skipped above `--loop-max-resamples`.
+Where both run, the F values are checked to agree to 1e-10.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from statsmodels.stats.anova import AnovaRM
+
+from open_intro.anova import rm_anova_resamples
+
+WITHIN = ['Prime', 'Target']
+
+
+def loop(data, resamples):
+    by_subject = dict(list(data.groupby('Subject')))
+    subjects = sorted(by_subject)
+    tables = []
+    for resample in resamples:
+        # Renumber the subjects so a subject drawn twice counts as two.
+        frame = pd.concat([by_subject[subjects[i]].assign(Subject=j) for j, i in enumerate(resample)])
+        tables.append(AnovaRM(data=frame, depvar='RT', within=WITHIN, subject='Subject').fit().anova_table)
+    return tables
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resamples', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--loop-max-resamples', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = pd.read_csv('data/ANOVA_data3.csv')
+    subjects = data['Subject'].nunique()
+    print('%10s %12s %12s' % ('resamples', 'AnovaRM', 'rm_anova'))
+    for count in args.resamples:
+        resamples = rng.integers(subjects, size=(count, subjects))
+        fast, result = timed(rm_anova_resamples, data, 'RT', 'Subject', WITHIN, resamples)
+        if count <= args.loop_max_resamples:
+            slow, expected = timed(loop, data, resamples)
+            for i, table in enumerate(expected):
+                assert np.allclose(result.loc[i].unstack().loc[table.index, 'F Value'], table['F Value'],
+                                   rtol=1e-10, atol=0), i
+            slow = '%11.3fs' % slow
+        else:
+            slow = '%12s' % 'skipped'
+        print('%10d %s %11.4fs' % (count, slow, fast))
+
+
+if __name__ == '__main__':
+    main()
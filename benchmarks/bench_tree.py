@@ -0,0 +1,86 @@
+"""Time to walk a large directory tree: open_intro.tree against the workshop tree().
+
+    python -m benchmarks.bench_tree --files 1000000
+
+Builds a synthetic tree of empty files, checks that both versions yield the
+same lines and times each of them walking it.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+
+from open_intro.tree import tree
+
+space = '    '
+branch = '│   '
+tee = '├── '
+last = '└── '
+directories_to_ignore = ['.git', '.Rproj.user']
+
+
+def workshop_tree(dir_path: Path, prefix: str=''):
+    contents = list(dir_path.iterdir())
+    pointers = [tee] * (len(contents) - 1) + [last]
+    for pointer, path in zip(pointers, contents):
+        yield prefix + pointer + path.name
+        if path.is_dir() and path.name not in directories_to_ignore:
+            extension = branch if pointer == tee else space
+            yield from workshop_tree(path, prefix=prefix+extension)
+
+
+def make_tree(root, files, files_per_directory=9, directories_per_directory=10):
+    """Fill `root` with `files` empty files, breadth first, and return how many directories it made.
+
+    Every directory gets `files_per_directory` files and up to
+    `directories_per_directory` subdirectories, until there are enough
+    directories to hold all the files. The root also gets a `.git`
+    directory, which `tree()` lists but doesn't descend into.
+    """
+    os.makedirs(os.path.join(root, '.git', 'objects'))
+    needed = -(-files // files_per_directory)
+    directories = 1
+    made = 0
+    queue = deque([root])
+    while made < files:
+        directory = queue.popleft()
+        for i in range(min(files_per_directory, files - made)):
+            open(os.path.join(directory, 'file%d.txt' % i), 'w').close()
+            made += 1
+        for i in range(min(directories_per_directory, needed - directories)):
+            path = os.path.join(directory, 'dir%d' % i)
+            os.mkdir(path)
+            queue.append(path)
+            directories += 1
+    return directories + 2
+
+
+def timed(walk, root):
+    start = time.perf_counter()
+    lines = sum(1 for _ in walk(root))
+    return time.perf_counter() - start, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=1000000)
+    parser.add_argument('--root', help='build the tree here rather than in a temporary directory')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.root) as tmp:
+        directories = make_tree(tmp, args.files)
+        print('%d files in %d directories' % (args.files, directories))
+        if list(tree(tmp)) != list(workshop_tree(Path(tmp))):
+            raise SystemExit('tree() and the workshop tree() disagree')
+        print('%-18s %8s %10s' % ('method', 'time', 'lines'))
+        for name, walk in (('workshop tree()', lambda root: workshop_tree(Path(root))),
+                           ('tree()', tree)):
+            seconds, lines = timed(walk, tmp)
+            print('%-18s %7.2fs %10d' % (name, seconds, lines))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Time saved by skipping build output when walking a project checkout.
+
+    python -m benchmarks.bench_tree_ignore --scale 1
+
+Builds a synthetic checkout in which most of the files are dependencies and
+build output, like a typical Python or web project, with a `.gitignore` that
+lists them, and times walking it with and without following the
+`.gitignore`.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from open_intro.tree import scan_usage, tree
+
+GITIGNORE = """\
+# build output
+__pycache__/
+*.py[cod]
+build/
+dist/
+*.egg-info/
+.venv/
+node_modules/
+docs/_build/
+!docs/_build/.keep
+"""
+
+
+def make_files(directory, files, per_directory=20, suffix='.py'):
+    for i in range(files):
+        path = os.path.join(directory, 'pkg%d' % (i // per_directory))
+        os.makedirs(path, exist_ok=True)
+        open(os.path.join(path, 'module%d%s' % (i % per_directory, suffix)), 'w').close()
+
+
+def make_checkout(root, scale=1):
+    """Fill `root` with about 5k source files and 150k ignored ones per unit of `scale`."""
+    with open(os.path.join(root, '.gitignore'), 'w') as f:
+        f.write(GITIGNORE)
+    make_files(os.path.join(root, 'src'), 5000 * scale)
+    for path, _, _ in list(os.walk(os.path.join(root, 'src'))):
+        make_files(os.path.join(path, '__pycache__'), 20, suffix='.pyc')
+    make_files(os.path.join(root, '.venv', 'lib', 'site-packages'), 50000 * scale)
+    make_files(os.path.join(root, 'node_modules'), 60000 * scale, suffix='.js')
+    make_files(os.path.join(root, 'build', 'lib'), 5000 * scale)
+    make_files(os.path.join(root, 'project.egg-info'), 5)
+    make_files(os.path.join(root, 'docs', '_build', 'html'), 2000 * scale, suffix='.html')
+    make_files(os.path.join(root, '.git', 'objects'), 20000 * scale, suffix='')
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_checkout(tmp, args.scale)
+        print('%-34s %8s %10s' % ('method', 'time', 'entries'))
+        for name, kwargs in (('tree()', {}), ('tree(gitignore=True)', {'gitignore': True})):
+            seconds, lines = timed(lambda: sum(1 for _ in tree(tmp, **kwargs)))
+            print('%-34s %7.2fs %10d' % (name, seconds, lines))
+        for name, kwargs in (('scan_usage()', {}), ('scan_usage(gitignore=True)', {'gitignore': True})):
+            seconds, usage = timed(scan_usage, tmp, **kwargs)
+            print('%-34s %7.2fs %10d' % (name, seconds, usage[tmp].files))
+
+
+if __name__ == '__main__':
+    main()
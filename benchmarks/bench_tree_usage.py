@@ -0,0 +1,102 @@
+"""Time to total up files and bytes per directory: open_intro.tree.scan_usage
+against walking the tree and then stat-ing every file.
+
+    python -m benchmarks.bench_tree_usage --files 200000 --latency-ms 1
+
+`--latency-ms` adds a delay to every call to `os.scandir` and `os.stat`, to
+stand in for a network drive. The rescan times are for a second scan with the cache
+after adding a file to 1% of the directories.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import open_intro.tree
+from benchmarks.bench_tree import make_tree, workshop_tree
+from open_intro.tree import scan_usage
+
+
+def two_passes(root):
+    """Print the tree as the workshop does, then os.walk it again to add up the sizes."""
+    for _ in workshop_tree(Path(root)):
+        pass
+    walked = []
+    for path, directories, names in os.walk(root):
+        directories[:] = [name for name in directories if name not in ('.git', '.Rproj.user')]
+        walked.append((path, directories, names))
+    usage = {}
+    for path, directories, names in reversed(walked):
+        files = len(names)
+        size = sum(os.lstat(os.path.join(path, name)).st_size for name in names)
+        for name in directories:
+            child = usage[os.path.join(path, name)]
+            files += child[0]
+            size += child[1]
+        usage[path] = (files, size)
+    return usage
+
+
+class slow_os:
+    """Make `os.stat` and `os.scandir` in open_intro.tree and here sleep first."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def __getattr__(self, name):
+        function = getattr(os, name)
+        if name not in ('stat', 'lstat', 'scandir'):
+            return function
+
+        def slow(*args, **kwargs):
+            time.sleep(self.latency)
+            return function(*args, **kwargs)
+        return slow
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=200000)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, 'tree')
+        os.mkdir(root)
+        directories = make_tree(root, args.files)
+        for path, _, names in os.walk(root):
+            for name in names:
+                with open(os.path.join(path, name), 'w') as f:
+                    f.write('x' * (hash(name) % 5000))
+        expected = two_passes(root)
+        if args.latency_ms:
+            open_intro.tree.os = slow_os(args.latency_ms / 1000)
+        print('%d files in %d directories, %.1f ms per call' % (args.files, directories, args.latency_ms))
+        print('%-36s %8s' % ('method', 'time'))
+        if not args.latency_ms:
+            print('%-36s %7.2fs' % ('workshop tree() + os.walk', timed(two_passes, root)[0]))
+        for workers in (1, 16, 64):
+            cache = os.path.join(tmp, 'cache%d.json' % workers)
+            seconds, usage = timed(scan_usage, root, workers, cache)
+            assert {path: tuple(totals) for path, totals in usage.items()} == expected
+            print('%-36s %7.2fs' % ('scan_usage, %d threads' % workers, seconds))
+            changed = random.Random(0).sample(sorted(usage), len(usage) // 100)
+            for path in changed:
+                open(os.path.join(path, 'new%d.txt' % workers), 'w').close()
+            seconds, usage = timed(scan_usage, root, workers, cache)
+            print('%-36s %7.2fs' % ('  rescan, 1% of directories changed', seconds))
+            for path in changed:
+                os.remove(os.path.join(path, 'new%d.txt' % workers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Synthetic copies of the workshop data, at any size.
+
+Each generator writes files shaped like one of the workshop's inputs and
+takes the size in the unit of `GENERATORS`. Generators that the single
+benchmarks already had are reused from them.
+
+    from benchmarks.generators import GENERATORS
+
+    make, unit = GENERATORS['ANOVA_data3.csv']
+    make('/tmp/ANOVA_data3.csv', 10000)  # 10,000 subjects
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_crime import make_crime_data
+from benchmarks.bench_diff import make_documents
+from benchmarks.bench_emails import make_school_csv
+from benchmarks.bench_reshape import make_challenge
+from benchmarks.bench_tree import make_tree
+
+ANOVA_MEANS = {('Negative', 'Negative'): 1420, ('Negative', 'Positive'): 1457,
+               ('Positive', 'Negative'): 1428, ('Positive', 'Positive'): 593}
+
+
+def make_anova_data1(path, subjects, seed=0):
+    """Write `ANOVA_data1.csv` for `subjects` subjects, half in each condition, to `path`."""
+    rng = np.random.default_rng(seed)
+    condition = np.where(np.arange(subjects) < subjects // 2, 'low', 'high')
+    rt = np.where(condition == 'low', 1178, 865) + rng.normal(0, 80, subjects)
+    pd.DataFrame({'Subject': np.arange(1, subjects + 1), 'Condition': condition,
+                  'RT': rt.round().astype(int)}).to_csv(path, index=False)
+
+
+def make_anova_data3(path, subjects, seed=0):
+    """Write `ANOVA_data3.csv` for `subjects` subjects, each in all four Prime x Target cells, to `path`."""
+    rng = np.random.default_rng(seed)
+    cells = list(ANOVA_MEANS)
+    means = np.repeat([ANOVA_MEANS[cell] for cell in cells], subjects)
+    pd.DataFrame({
+        'Subject': np.tile(np.arange(1, subjects + 1), len(cells)),
+        'Prime': np.repeat([prime for prime, _ in cells], subjects),
+        'Target': np.repeat([target for _, target in cells], subjects),
+        'RT': (means + rng.normal(0, 110, len(means))).round().astype(int),
+    }).to_csv(path, index=False)
+
+
+def make_text_pair(directory, lines, seed=0):
+    """Write `file1` and `file2`, two drafts of a `lines`-line document, to `directory`."""
+    fromlines, tolines = make_documents(lines, seed=seed)
+    os.makedirs(directory, exist_ok=True)
+    for name, text in (('file1', fromlines), ('file2', tolines)):
+        with open(os.path.join(directory, name), 'w') as file:
+            file.writelines(text)
+
+
+def make_project_tree(directory, files, seed=0):
+    """Fill `directory` with `files` empty files in nested directories."""
+    make_tree(directory, files)
+
+
+# name: (generator, unit of its size argument)
+GENERATORS = {
+    'ANOVA_data1.csv': (make_anova_data1, 'subjects'),
+    'ANOVA_data3.csv': (make_anova_data3, 'subjects'),
+    'ANOVA_challenge.csv': (make_challenge, 'participants'),
+    'crime_dataset.csv': (make_crime_data, 'rows'),
+    'schools.csv': (make_school_csv, 'MB'),
+    'file1, file2': (make_text_pair, 'lines'),
+    'tree': (make_project_tree, 'files'),
+}
@@ -0,0 +1,258 @@
+"""Time every stage of the workshop pipelines at several scales and save the results.
+
+    python -m benchmarks.suite                      # scales 1 and 10
+    python -m benchmarks.suite --scales 1 10 100 --repeat 5
+    python -m benchmarks.suite --compare benchmarks/results/<commit>.json
+
+Each stage (loading, grouping, fitting, reshaping, the regex scan, the diff
+and the tree walk) runs on synthetic data from `benchmarks.generators`, at
+`STAGES`' base size times each scale, both the workshop's way and through
+`open_intro`. The data is made once per dataset and scale, outside the
+timings, and each time is the best of `--repeat` runs. Stages that are too
+slow or too big at large scales stop at their `max_scale`.
+
+The results are written as JSON to `benchmarks/results/<commit>.json`,
+with the commit, the versions of Python, NumPy and pandas, and one record
+per stage and scale, so that runs on different commits can be compared
+with `--compare` and the records plotted against size. The table printed at
+the end gives, for each stage, how the time grows with size: an exponent of
+1 is linear.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from statsmodels.formula.api import ols
+from statsmodels.stats.anova import AnovaRM
+
+from benchmarks.bench_crime import workshop_steps
+from benchmarks.bench_emails import workshop_loop
+from benchmarks.bench_reshape import FACTORS, melt_and_split
+from benchmarks.bench_tree import workshop_tree
+from benchmarks.generators import GENERATORS
+from open_intro.anova import rm_anova
+from open_intro.crime import read_crime_data
+from open_intro.diff import diff_files
+from open_intro.emails import extract_emails
+from open_intro.regression import grouped_ols
+from open_intro.reshape import rm_anova_wide, wide_to_long
+from open_intro.tree import tree
+
+RESULTS_DIR = os.path.join('benchmarks', 'results')
+
+# `setup` turns the path of the generated data into the input of `run`,
+# untimed; `max_scale` is the largest scale the stage runs at.
+Stage = namedtuple('Stage', 'name dataset size setup run max_scale')
+
+
+def _path(path):
+    return path
+
+
+def _groupby(data):
+    return data.groupby('Condition')['RT'].agg(['count', 'mean', 'std'])
+
+
+def _anova_lm(data):
+    return sm.stats.anova_lm(ols('RT ~ Condition', data=data).fit(), typ=3)
+
+
+def _anova_rm(data):
+    return AnovaRM(data, 'RT', 'Subject', within=['Prime', 'Target']).fit().anova_table
+
+
+def _melt_and_rm_anova(path):
+    return AnovaRM(melt_and_split(path), 'RT', 'participant', within=FACTORS).fit().anova_table
+
+
+def _wide_to_long(path):
+    return wide_to_long(pd.read_csv(path), 'participant', FACTORS)
+
+
+def _rm_anova_wide(path):
+    return rm_anova_wide(pd.read_csv(path), 'participant', FACTORS)
+
+
+def _crime_ols(data):
+    return ols('Violent_Crimes ~ Population', data=data).fit().params
+
+
+def _grouped_ols(data):
+    return grouped_ols(data, 'Violent_Crimes', 'Population', ['Year', 'State'])
+
+
+def _extract_emails(path):
+    return list(extract_emails(path, unique=False))
+
+
+def _text_pair(directory):
+    return os.path.join(directory, 'file1'), os.path.join(directory, 'file2'), os.path.join(directory, 'diff.html')
+
+
+def _diff(files):
+    return diff_files(*files)
+
+
+def _workshop_tree(directory):
+    return sum(1 for _ in workshop_tree(Path(directory)))
+
+
+def _tree(directory):
+    return sum(1 for _ in tree(Path(directory)))
+
+
+STAGES = [
+    Stage('ANOVA_data1 load read_csv', 'ANOVA_data1.csv', 100000, _path, pd.read_csv, None),
+    Stage('ANOVA_data1 groupby count/mean/std', 'ANOVA_data1.csv', 100000, pd.read_csv, _groupby, None),
+    Stage('ANOVA_data1 fit ols + anova_lm', 'ANOVA_data1.csv', 100000, pd.read_csv, _anova_lm, None),
+    # AnovaRM's design matrix has a column per subject, so its time grows
+    # with the cube of their number: 500 subjects take seconds, 2,000 minutes.
+    Stage('ANOVA_data3 fit AnovaRM', 'ANOVA_data3.csv', 50, pd.read_csv, _anova_rm, 10),
+    Stage('ANOVA_data3 fit rm_anova', 'ANOVA_data3.csv', 50, pd.read_csv,
+          lambda data: rm_anova(data, 'RT', 'Subject', ['Prime', 'Target']), 10),
+    Stage('ANOVA_challenge reshape melt + str.split', 'ANOVA_challenge.csv', 100000, _path, melt_and_split, None),
+    Stage('ANOVA_challenge reshape wide_to_long', 'ANOVA_challenge.csv', 100000, _path, _wide_to_long, None),
+    Stage('ANOVA_challenge fit melt + AnovaRM', 'ANOVA_challenge.csv', 50, _path, _melt_and_rm_anova, 10),
+    Stage('ANOVA_challenge fit rm_anova_wide', 'ANOVA_challenge.csv', 50, _path, _rm_anova_wide, 10),
+    Stage('crime load read_csv + str.rsplit', 'crime_dataset.csv', 100000, _path, workshop_steps, None),
+    Stage('crime load read_crime_data', 'crime_dataset.csv', 100000, _path, read_crime_data, None),
+    Stage('crime fit ols', 'crime_dataset.csv', 100000, read_crime_data, _crime_ols, None),
+    Stage('crime fit grouped_ols by year x state', 'crime_dataset.csv', 100000, read_crime_data, _grouped_ols, None),
+    Stage('schools regex scan workshop loop', 'schools.csv', 1, _path, workshop_loop, None),
+    Stage('schools regex scan extract_emails', 'schools.csv', 1, _path, _extract_emails, None),
+    Stage('file1, file2 diff diff_files', 'file1, file2', 10000, _text_pair, _diff, None),
+    Stage('tree walk workshop', 'tree', 1000, _path, _workshop_tree, None),
+    Stage('tree walk tree()', 'tree', 1000, _path, _tree, None),
+]
+
+
+def best_of(function, argument, repeat):
+    """Return the shortest of `repeat` timings of `function(argument)`, and all of them."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        runs.append(time.perf_counter() - start)
+    return min(runs), runs
+
+
+def run_suite(scales, repeat=3, stages=STAGES, directory=None):
+    """Return one record per stage and scale, making the data in `directory` (a temporary one by default)."""
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        made = {}
+        records = []
+        for scale in sorted(scales):
+            for stage in stages:
+                if stage.max_scale is not None and scale > stage.max_scale:
+                    continue
+                make, unit = GENERATORS[stage.dataset]
+                size = stage.size * scale
+                path = made.get((stage.dataset, size))
+                if path is None:
+                    path = os.path.join(tmp, '%d' % size, stage.dataset.replace(', ', '_'))
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    make(path, size)
+                    made[stage.dataset, size] = path
+                seconds, runs = best_of(stage.run, stage.setup(path), repeat)
+                records.append({'stage': stage.name, 'dataset': stage.dataset, 'scale': scale,
+                                'size': size, 'unit': unit, 'seconds': seconds, 'runs': runs})
+                print('%-44s %6d x %12.4f s' % (stage.name, scale, seconds), flush=True)
+    return records
+
+
+def environment():
+    """Return the commit being benchmarked and the versions the timings depend on."""
+    def git(*args):
+        try:
+            return subprocess.run(['git'] + list(args), check=True, capture_output=True, text=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def scaling(records):
+    """Return the log-log slope of time against size for each stage run at more than one scale."""
+    points = {}
+    for record in records:
+        points.setdefault(record['stage'], []).append((record['size'], record['seconds']))
+    slopes = {}
+    for stage, values in points.items():
+        if len(values) > 1 and all(seconds > 0 for _, seconds in values):
+            sizes, seconds = np.log(values).T
+            slopes[stage] = np.polyfit(sizes, seconds, 1)[0]
+    return slopes
+
+
+def print_table(records):
+    scales = sorted({record['scale'] for record in records})
+    times = {(record['stage'], record['scale']): record['seconds'] for record in records}
+    slopes = scaling(records)
+    print('\n%-44s' % 'stage' + ''.join('%12s' % ('x%d' % scale) for scale in scales) + '%10s' % 'exponent')
+    for stage in dict.fromkeys(record['stage'] for record in records):
+        cells = ''.join('%11.4fs' % times[stage, scale] if (stage, scale) in times else '%12s' % '-'
+                        for scale in scales)
+        print('%-44s%s%10s' % (stage, cells, '%.2f' % slopes[stage] if stage in slopes else '-'))
+
+
+def print_comparison(records, baseline):
+    """Print the ratio of each time in `records` to the same stage and size in the results `baseline`."""
+    before = {(record['stage'], record['size']): record['seconds'] for record in baseline['records']}
+    print('\nagainst %s' % (baseline['environment'].get('commit') or 'baseline'))
+    print('%-44s %10s %12s %12s %8s' % ('stage', 'size', 'before', 'after', 'ratio'))
+    for record in records:
+        old = before.get((record['stage'], record['size']))
+        if old is None:
+            continue
+        print('%-44s %10d %11.4fs %11.4fs %7.2fx' % (record['stage'], record['size'], old, record['seconds'],
+                                                   record['seconds'] / old if old else math.inf))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', nargs='+', metavar='TEXT',
+                        help='only run the stages whose names contain one of these')
+    parser.add_argument('--output', help='where to write the results (default: %s/<commit>.json)' % RESULTS_DIR)
+    parser.add_argument('--compare', metavar='RESULTS', help='results of an earlier run to compare with')
+    parser.add_argument('--tmp', help='directory for the generated data (default: the system one)')
+    args = parser.parse_args(argv)
+
+    stages = [stage for stage in STAGES if not args.stages or any(text in stage.name for text in args.stages)]
+    about = environment()
+    records = run_suite(args.scales, args.repeat, stages, args.tmp)
+    output = args.output or os.path.join(RESULTS_DIR, '%s.json' % (about['commit'] or 'results')[:12])
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump({'environment': about, 'records': records}, file, indent=1)
+    print_table(records)
+    if args.compare:
+        with open(args.compare) as file:
+            print_comparison(records, json.load(file))
+    print('\nresults written to %s' % output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+"""Reusable versions of the scripts used in the workshops.
+
+The notebooks keep the short, readable versions of each script so they are
+easy to follow in class. The modules here are the same ideas written to cope
+with much bigger inputs than the workshop examples.
+"""
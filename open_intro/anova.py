@@ -0,0 +1,236 @@
+"""ANOVAs of thousands of dependent variables or resamples at once.
+
+The pandas workshop runs `ols('RT ~ Condition', data=anova_data).fit()` and
+`sm.stats.anova_lm(model, typ=3)` for its one dependent variable (DV). When
+the same design is screened over thousands of DVs, such as the RT to each
+item or the signal in each voxel, fitting one statsmodels model per column
+spends nearly all its time parsing the formula and building objects.
+`mass_anova` builds the design matrix once and fits every column together:
+
+- the design is the same treatment-coded matrix patsy builds for
+  `RT ~ Condition`, and is factorised once with a QR decomposition,
+- the coefficients of every DV come from one triangular solve against all
+  the columns at once, and the residual sums of squares from one pass over
+  the residuals,
+- the type III sums of squares are the same Wald tests `anova_lm(typ=3)`
+  does, evaluated for every DV with one `einsum`.
+
+The result has one row per DV, laid out so that
+`mass_anova(data, 'Condition', ['RT']).loc['RT'].unstack(sort=False)` is the
+`anova_lm` table, plus eta squared and omega squared for the factor.
+
+Time for 24 participants in two conditions (see `benchmarks/bench_anova.py`):
+
+    DVs        ols + anova_lm per DV    mass_anova
+    10         0.14 s                   4.8 ms
+    100        1.6 s                    3.4 ms
+    1,000      35 s                     5.3 ms
+    10,000     skipped                  25 ms
+    100,000    skipped                  0.19 s
+
+The loop gets slower per DV as the DataFrame gets wider, because the
+formula parser looks up its variables in the whole frame every time.
+
+The workshop's factorial ANOVA fits `AnovaRM(data=factorial_anova_data,
+depvar='RT', within=['Prime', 'Target'], subject='Subject')` once.
+Bootstrapping it, or fitting it to many sub-populations, repeats the same
+reshaping of the long-format frame for every fit. `rm_anova_resamples`
+pivots the data once into an array with one axis for the subjects and one
+for each factor (`subject_cells`), and then:
+
+- each resample is a row of subject positions, so a batch of resamples is
+  one fancy-indexing step that adds a leading axis to the array,
+- every main effect and interaction is a few means and sums over the
+  factor axes, done for all resamples at once (`rm_anova_arrays`).
+
+`rm_anova` gives the `AnovaRM` table for the data as it stands, and agrees
+with it to rounding error. Time for bootstrap resamples of the 24 subjects
+of `ANOVA_data3.csv` (see `benchmarks/bench_rm_anova.py`):
+
+    resamples    AnovaRM per resample    rm_anova_resamples
+    10           0.23 s                  4.4 ms
+    100          2.4 s                   3.2 ms
+    1,000        25 s                    20 ms
+    10,000       skipped                 0.18 s
+    100,000      skipped                 1.8 s
+"""
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+STATS = ['sum_sq', 'df', 'F', 'PR(>F)']
+RM_STATS = ['F Value', 'Num DF', 'Den DF', 'Pr > F']
+
+
+def one_way_design(groups):
+    """Return the treatment-coded design matrix for `groups` and its levels.
+
+    The first column is the intercept and there is one column for each level
+    after the first, in sorted order, as patsy does for `~ C(groups)`.
+    """
+    levels, codes = np.unique(np.asarray(groups), return_inverse=True)
+    design = np.ones((len(codes), len(levels)))
+    design[:, 1:] = codes[:, None] == np.arange(1, len(levels))
+    return design, levels
+
+
+def mass_anova(data, factor, dvs=None):
+    """Return the one-way type III ANOVA of each column `dvs` of `data` against `factor`.
+
+    `data` is a DataFrame with one row per observation, the column `factor`
+    giving each observation's group and one column per DV (by default, every
+    other column). The result is a DataFrame indexed by DV whose columns are
+    `(term, statistic)` pairs, with the terms `Intercept`, `factor` and
+    `Residual` and the statistics of `anova_lm`, plus `(factor, 'eta_sq')`
+    and `(factor, 'omega_sq')`.
+    """
+    if dvs is None:
+        dvs = [column for column in data.columns if column != factor]
+    values = data[dvs].to_numpy(dtype=float)
+    if np.isnan(values).any():
+        raise ValueError('the DVs have missing values; every DV must be observed in every row')
+    design, _ = one_way_design(data[factor])
+    results = anova_arrays(design, values)
+    columns = {}
+    for term, name in (('Intercept', 'Intercept'), ('factor', factor)):
+        for statistic in STATS:
+            columns[name, statistic] = results[term][statistic]
+    columns[factor, 'eta_sq'] = results['factor']['eta_sq']
+    columns[factor, 'omega_sq'] = results['factor']['omega_sq']
+    columns['Residual', 'sum_sq'] = results['Residual']['sum_sq']
+    columns['Residual', 'df'] = results['Residual']['df']
+    columns['Residual', 'F'] = np.nan
+    columns['Residual', 'PR(>F)'] = np.nan
+    return pd.DataFrame(columns, index=pd.Index(dvs, name='DV'))
+
+
+def anova_arrays(design, values):
+    """Type III ANOVA of every column of `values` against a one-way `design`.
+
+    `design` is the (observations, 1 + levels - 1) matrix from
+    `one_way_design` and `values` is (observations, DVs). Returns a dict
+    mapping `Intercept`, `factor` and `Residual` to dicts of arrays with
+    one entry per DV.
+    """
+    observations, parameters = design.shape
+    q, r = np.linalg.qr(design)
+    coefficients = np.linalg.solve(r, q.T @ values)
+    residuals = values - design @ coefficients
+    rss = np.einsum('ij,ij->j', residuals, residuals)
+    df_resid = observations - parameters
+    mse = rss / df_resid
+    # (X'X)^-1 from the triangular factor, for the Wald tests.
+    r_inv = np.linalg.inv(r)
+    covariance = r_inv @ r_inv.T
+
+    results = {'Residual': {'sum_sq': rss, 'df': np.full(rss.shape, float(df_resid))}}
+    for term, rows in (('Intercept', [0]), ('factor', list(range(1, parameters)))):
+        b = coefficients[rows]
+        sum_sq = np.einsum('im,ij,jm->m', b, np.linalg.inv(covariance[np.ix_(rows, rows)]), b)
+        f = sum_sq / len(rows) / mse
+        results[term] = {'sum_sq': sum_sq, 'df': np.full(rss.shape, float(len(rows))),
+                         'F': f, 'PR(>F)': stats.f.sf(f, len(rows), df_resid)}
+
+    between = results['factor']['sum_sq']
+    results['factor']['eta_sq'] = between / (between + rss)
+    results['factor']['omega_sq'] = (between - (parameters - 1) * mse) / (between + rss + mse)
+    return results
+
+
+def subject_cells(data, depvar, subject, within):
+    """Pivot long-format `data` into an array with one axis per subject and factor.
+
+    Returns `(cells, subjects, levels)`: `cells[s, i, j, ...]` is `depvar`
+    for the `s`th of `subjects` in level `i` of the first factor of `within`,
+    level `j` of the second and so on, and `levels` lists the sorted levels
+    of each factor. Every subject must have exactly one observation in every
+    cell, as `AnovaRM` requires without `aggregate_func`.
+    """
+    within = [within] if isinstance(within, str) else list(within)
+    codes, labels = zip(*(pd.factorize(data[column], sort=True) for column in [subject] + within))
+    shape = tuple(len(label) for label in labels)
+    counts = np.zeros(shape, dtype=np.int64)
+    np.add.at(counts, codes, 1)
+    if (counts != 1).any():
+        raise ValueError('every subject needs exactly one %s in each cell of %s' % (depvar, ', '.join(within)))
+    cells = np.empty(shape)
+    cells[codes] = data[depvar].to_numpy(dtype=float)
+    return cells, labels[0], list(labels[1:])
+
+
+def rm_anova(data, depvar, subject, within):
+    """Return the repeated-measures ANOVA table of `AnovaRM(data, depvar, subject, within).fit()`."""
+    within = [within] if isinstance(within, str) else list(within)
+    cells, _, _ = subject_cells(data, depvar, subject, within)
+    return rm_anova_table(cells, within)
+
+
+def rm_anova_table(cells, within):
+    """Return the `AnovaRM` table for the (subjects, levels of each factor) array `cells`."""
+    results = rm_anova_arrays(cells, within)
+    table = pd.DataFrame({effect: {statistic: results[effect][statistic] for statistic in RM_STATS}
+                          for effect in results}).T
+    return table[RM_STATS]
+
+
+def rm_anova_resamples(data, depvar, subject, within, resamples):
+    """Return the repeated-measures ANOVA of `data` for each resample of its subjects.
+
+    `resamples` is an array of shape (resamples, subjects per resample), or a
+    list of equally long arrays, of positions in the sorted subjects of
+    `data`: `np.random.default_rng().integers(n, size=(1000, n))` gives 1000
+    bootstrap resamples, and rows of sorted positions give sub-populations.
+    The result has one row per resample and `(effect, statistic)` columns.
+    """
+    within = [within] if isinstance(within, str) else list(within)
+    cells, _, _ = subject_cells(data, depvar, subject, within)
+    results = rm_anova_arrays(cells, within, resamples)
+    return pd.DataFrame({(effect, statistic): results[effect][statistic]
+                         for effect in results for statistic in RM_STATS + ['sum_sq', 'error_sum_sq']},
+                        index=pd.RangeIndex(len(resamples), name='resample'))
+
+
+def rm_anova_arrays(cells, within, resamples=None):
+    """Repeated-measures ANOVA of the (subjects, levels of each factor) array `cells`.
+
+    Returns a dict mapping each effect of `within`, named as `AnovaRM` names
+    them (`Prime`, `Target`, `Prime:Target`), to a dict of its `RM_STATS`
+    plus `sum_sq` and `error_sum_sq`. With `resamples`, an integer array of
+    shape (resamples, subjects), every statistic is an array with one value
+    per resample.
+    """
+    cells = np.asarray(cells, dtype=float)
+    if resamples is not None:
+        cells = cells[np.asarray(resamples)]
+    # Work on (..., subjects, factor 1, factor 2, ...) so a batch of
+    # resamples is just a leading axis.
+    factor_axes = list(range(cells.ndim - len(within), cells.ndim))
+    subjects = cells.shape[factor_axes[0] - 1]
+    results = {}
+    for size in range(1, len(within) + 1):
+        for effect in combinations(range(len(within)), size):
+            axes = [factor_axes[i] for i in effect]
+            others = tuple(axis for axis in factor_axes if axis not in axes)
+            # Average over the other factors, then remove the main effects
+            # of the subject and of each factor in the effect, leaving the
+            # effect plus its interaction with subjects.
+            component = cells.mean(axis=others, keepdims=True) if others else cells
+            for axis in axes:
+                component = component - component.mean(axis=axis, keepdims=True)
+            effect_means = component.mean(axis=factor_axes[0] - 1, keepdims=True)
+            error = component - effect_means
+            replicates = np.prod([cells.shape[axis] for axis in others], dtype=float)
+            sum_axes = tuple([factor_axes[0] - 1] + factor_axes)
+            sum_sq = replicates * subjects * np.square(effect_means).sum(axis=sum_axes)
+            error_sum_sq = replicates * np.square(error).sum(axis=sum_axes)
+            num_df = float(np.prod([cells.shape[axis] - 1 for axis in axes]))
+            den_df = num_df * (subjects - 1)
+            f = (sum_sq / num_df) / (error_sum_sq / den_df)
+            results[':'.join(within[i] for i in effect)] = {
+                'F Value': f, 'Num DF': num_df, 'Den DF': den_df, 'Pr > F': stats.f.sf(f, num_df, den_df),
+                'sum_sq': sum_sq, 'error_sum_sq': error_sum_sq,
+            }
+    return results
@@ -0,0 +1,472 @@
+"""Build the book, running only the notebook cells that have changed.
+
+`_config.yml` sets `execute_notebooks: force`, so every `jb build ./` runs
+all three chapters from scratch, downloads every dataset and fits every
+model again, even when the only change is a word in a markdown cell.
+`python -m open_intro.build` runs the notebooks itself, keeps the outputs
+of every code cell in a cache, and then hands the executed notebooks to
+`jb build` with execution turned off:
+
+- each code cell is cached under a hash of its source and tags, the hash
+  of the code cell before it (and so of every code cell before it), the
+  kernel, and the contents of any file in the book that the cell names,
+  such as `'data/ANOVA_data1.csv'` or `from open_intro.anova import ...`,
+- editing a markdown cell changes no hash, so no kernel is started at all;
+  editing a code cell or a data file invalidates that cell and every code
+  cell after it in the same notebook, and that notebook is run again from
+  the top, because the kernel needs the state the earlier cells built,
+- as in `jb build`, a cell that raises stops its notebook, unless it is
+  tagged `raises-exception` or `_config.yml` sets `execute.allow_errors`,
+  in which case the error is cached as the cell's output and the notebook
+  carries on. A notebook that stops is rendered with the outputs saved in
+  it and the traceback is written to `_build/html/reports/<notebook>.log`.
+  The failure is cached too, so an unchanged failing notebook isn't run
+  again on every build,
+- the chapters don't depend on each other, so the notebooks that need a
+  kernel are run side by side in a pool of `--workers` processes (by
+  default one per notebook, up to the number of CPUs), each executed
+  notebook going into `_build/jupyter_execute` as soon as it finishes,
+- the book is then rendered once, from a copy in `_build/.stage` in which
+  only the files that changed are rewritten, so Sphinx re-reads only those
+  pages.
+
+At the end it prints how long each notebook took, how many cells were run
+and how many were reused, the wall-clock time of running them all, and how
+long the whole rebuild took. With the notebooks running in parallel the
+slowest notebook sets the execution time, and the report shows which one
+that is.
+
+It is meant for working on the book locally: run it in place of `jb build ./`
+to see an edit rendered. `build_script.sh` and `local_rebuild_script` still
+run `jb build ./`, so the published book is always executed from scratch.
+
+Notebooks only run faster side by side with a CPU each, so `--workers`
+defaults to one per notebook, up to the number of CPUs.
+
+    python -m open_intro.build             # instead of jb build ./
+    python -m open_intro.build --force     # run every cell again
+    python -m open_intro.build --workers 1 # one notebook at a time
+
+`--profile` records the time, memory and input of every cell instead of
+using the cache, and can fail the build on regressions; see
+`open_intro/cell_profile.py`.
+
+The cache lives in `_build/.cell_cache`. It only holds outputs, so it is
+safe to delete at any time.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import nbformat
+import yaml
+from nbclient import NotebookClient
+from nbclient.exceptions import CellExecutionError
+
+from open_intro.cell_profile import (PROFILE_BASELINE, KernelProbe, cell_record, load_profile, regressions,
+                                     save_profile, write_report)
+
+BOOK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join('_build', '.cell_cache')
+STAGE_DIR = os.path.join('_build', '.stage')
+EXECUTE_DIR = os.path.join('_build', 'jupyter_execute')
+REPORTS_DIR = os.path.join('_build', 'html', 'reports')
+# Left out of the staged copy of the book: build output, version control
+# and caches that Sphinx doesn't need.
+NOT_STAGED = {'_build', '.git', '.ipynb_checkpoints', '.columnar', '__pycache__', 'benchmarks'}
+
+_STRING = re.compile(r'''(['"])([^'"\n]+?)\1''')
+_IMPORT = re.compile(r'^\s*(?:from|import)\s+([\w.]+)', re.MULTILINE)
+
+
+def build(book=BOOK_DIR, cache_dir=None, force=False, timeout=None, render=True, workers=None, profile=False):
+    """Execute the notebooks of `book` using the cell cache, render the book and return the timings.
+
+    Up to `workers` notebooks run at once. The result is a dict with
+    `notebooks`, a list of `(path, NotebookRun)` in the order of `_toc.yml`,
+    and `execute`, `render` and `total` wall-clock times in seconds. With
+    `profile`, every cell is run and the profile of each notebook's cells
+    is in its `NotebookRun`.
+    """
+    start = time.perf_counter()
+    cache = CellCache(os.path.join(book, cache_dir or CACHE_DIR))
+    stage = os.path.join(book, STAGE_DIR)
+    sync_stage(book, stage)
+    paths = toc_notebooks(book)
+    workers = workers or min(len(paths), os.cpu_count() or 1)
+    allow_errors = bool(_book_config(book).get('execute', {}).get('allow_errors', False))
+    runs = {}
+    for path, run in _execute_all(book, paths, cache, force, timeout, workers, profile, allow_errors):
+        text = nbformat.writes(run.notebook) + '\n'
+        _write_if_changed(os.path.join(stage, path), text)
+        _write_if_changed(os.path.join(book, EXECUTE_DIR, path), text)
+        runs[path] = run
+    runs = [(path, runs[path]) for path in paths]
+    executed = time.perf_counter()
+    if render:
+        subprocess.run(['jb', 'build', stage, '--path-output', book], check=True)
+        write_reports(book, runs)
+    if profile:
+        write_report([record for _, run in runs for record in run.profile], os.path.join(book, REPORTS_DIR))
+    end = time.perf_counter()
+    return {'notebooks': runs, 'execute': executed - start, 'render': end - executed, 'total': end - start}
+
+
+def _execute_all(book, paths, cache, force, timeout, workers, profile, allow_errors):
+    # Yield (path, NotebookRun) for each notebook as it finishes.
+    if workers <= 1:
+        for path in paths:
+            yield path, execute_notebook(os.path.join(book, path), cache, force, timeout, profile, allow_errors)
+        return
+    # Each notebook runs in a process of its own, with its own kernel, so
+    # that no two share an event loop. The cell cache is safe to share, as
+    # every entry is written to a temporary file and renamed into place.
+    with ProcessPoolExecutor(workers) as executor:
+        futures = {executor.submit(execute_notebook, os.path.join(book, path), cache, force, timeout,
+                                   profile, allow_errors): path
+                   for path in paths}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def toc_notebooks(book):
+    """Return the paths, relative to `book`, of the notebooks listed in `_toc.yml`, in order."""
+    with open(os.path.join(book, '_toc.yml')) as file:
+        toc = yaml.safe_load(file)
+    paths = []
+    for entry in _toc_files(toc):
+        path = entry if entry.endswith('.ipynb') else entry + '.ipynb'
+        if os.path.exists(os.path.join(book, path)):
+            paths.append(path)
+    return paths
+
+
+def _toc_files(node):
+    # `_toc.yml` nests `file` entries under `sections`, `chapters` and
+    # `parts` depending on its format; all of them are walked in order.
+    if isinstance(node, list):
+        for child in node:
+            yield from _toc_files(child)
+    elif isinstance(node, dict):
+        for key in ('root', 'file'):
+            if key in node:
+                yield node[key]
+        for key, child in node.items():
+            if isinstance(child, (list, dict)):
+                yield from _toc_files(child)
+
+
+class NotebookRun:
+    """The executed notebook and what it took: cells `executed` and `reused`, `seconds` and any `error`.
+
+    `profile` has a `cell_profile.cell_record` for each cell executed with
+    profiling on.
+    """
+
+    def __init__(self, notebook):
+        self.notebook = notebook
+        self.executed = 0
+        self.reused = 0
+        self.seconds = 0.0
+        self.error = None
+        self.profile = []
+
+
+class CellCache:
+    """Outputs of code cells, one JSON file per cell key."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def get(self, key):
+        try:
+            with open(os.path.join(self.directory, key + '.json')) as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, key, cell, error=None):
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {'outputs': cell.get('outputs', []), 'execution_count': cell.get('execution_count'),
+                 'error': error}
+        fd, partial = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'w') as file:
+            json.dump(entry, file)
+        os.replace(partial, os.path.join(self.directory, key + '.json'))
+
+
+def cell_keys(notebook, directory, allow_errors=False):
+    """Return the cache key of each cell of `notebook`, or None for cells that aren't code.
+
+    `directory` is the one the notebook runs in, which file names in the
+    cells are relative to. Whether errors are allowed, and the tags of each
+    cell, such as `raises-exception`, are part of the key, since they
+    decide whether a cell that raises stops the notebook.
+    """
+    kernel = notebook.metadata.get('kernelspec', {}).get('name', '')
+    previous = hashlib.sha256(('%s\0%d' % (kernel, allow_errors)).encode('utf-8')).hexdigest()
+    keys = []
+    for cell in notebook.cells:
+        if cell.cell_type != 'code':
+            keys.append(None)
+            continue
+        digest = hashlib.sha256(previous.encode('ascii'))
+        digest.update(cell.source.encode('utf-8'))
+        digest.update(b'\0' + json.dumps(sorted(cell.metadata.get('tags', []))).encode('utf-8'))
+        for path in referenced_files(cell.source, directory):
+            name = os.path.relpath(path, directory)
+            digest.update(b'\0' + name.encode('utf-8') + b'\0' + _file_hash(path).encode('ascii'))
+        previous = digest.hexdigest()
+        keys.append(previous)
+    return keys
+
+
+def referenced_files(source, directory):
+    """Return the files in `directory` that the cell `source` names, as data files or local modules."""
+    candidates = [match.group(2) for match in _STRING.finditer(source)]
+    for module in _IMPORT.findall(source):
+        parts = module.split('.')
+        candidates += [os.path.join(*parts) + '.py', os.path.join(*parts, '__init__.py')]
+    paths = set()
+    for candidate in candidates:
+        path = os.path.join(directory, os.path.expanduser(candidate))
+        if os.path.isfile(path):
+            paths.add(os.path.normpath(path))
+    return sorted(paths)
+
+
+_file_hashes = {}
+
+
+def _file_hash(path):
+    # Hash each file once per build, however many cells name it.
+    stat = os.stat(path)
+    signature = (path, stat.st_size, stat.st_mtime_ns)
+    if signature not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        _file_hashes[signature] = digest.hexdigest()
+    return _file_hashes[signature]
+
+
+def execute_notebook(path, cache, force=False, timeout=None, profile=False, allow_errors=False):
+    """Return a `NotebookRun` of the notebook at `path`, reusing cached cells where possible.
+
+    With `profile`, every cell is run and profiled. As in `jb build`, a
+    cell that raises stops the notebook unless `allow_errors` is set or the
+    cell is tagged `raises-exception`; otherwise its error is an output
+    like any other.
+    """
+    start = time.perf_counter()
+    notebook = read_notebook(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    keys = cell_keys(notebook, directory, allow_errors)
+    run = NotebookRun(notebook)
+    cached = {} if force or profile else {key: cache.get(key) for key in keys if key}
+    missing = [i for i, key in enumerate(keys) if key and not cached.get(key)]
+    failed = [i for i, key in enumerate(keys) if key and cached.get(key) and cached[key]['error']]
+    if failed and (not missing or failed[0] < missing[0]):
+        # This notebook failed before and nothing up to the failure has
+        # changed, so it would fail the same way again.
+        run.error = cached[keys[failed[0]]]['error']
+        run.notebook = read_notebook(path)
+    elif not missing:
+        for cell, key in zip(notebook.cells, keys):
+            if key:
+                cell.outputs = [nbformat.from_dict(output) for output in cached[key]['outputs']]
+                cell.execution_count = cached[key]['execution_count']
+                run.reused += 1
+    else:
+        _run_kernel(notebook, keys, directory, cache, timeout, allow_errors, run,
+                    profile and os.path.basename(path))
+        if run.error:
+            run.notebook = read_notebook(path)
+    run.seconds = time.perf_counter() - start
+    return run
+
+
+def read_notebook(path):
+    """Read the notebook at `path` as nbformat 4, numbering cells that have no id.
+
+    nbformat makes up a random id for each cell without one, which would
+    change the staged copy, and make Sphinx read it again, on every build.
+    """
+    with open(path, encoding='utf-8') as file:
+        text = file.read()
+    notebook = nbformat.reads(text, as_version=4)
+    for index, cell in enumerate(json.loads(text).get('cells', [])):
+        if 'id' not in cell and index < len(notebook.cells):
+            notebook.cells[index].id = 'cell-%d' % index
+    return notebook
+
+
+def _run_kernel(notebook, keys, directory, cache, timeout, allow_errors, run, profile_as=None):
+    # Run every code cell in a new kernel. With `profile_as`, the name of
+    # the notebook, each cell is profiled.
+    client = NotebookClient(notebook, timeout=timeout, allow_errors=allow_errors,
+                            resources={'metadata': {'path': directory}})
+    with client.setup_kernel():
+        probe = KernelProbe(_kernel_pid(client.km)) if profile_as else None
+        for index, (cell, key) in enumerate(zip(notebook.cells, keys)):
+            if not key:
+                continue
+            if probe:
+                probe.start()
+            start = time.perf_counter()
+            try:
+                client.execute_cell(cell, index)
+            except CellExecutionError as error:
+                run.error = str(error)
+                cache.put(key, cell, run.error)
+                return
+            finally:
+                if probe:
+                    run.profile.append(cell_record(profile_as, index, cell, time.perf_counter() - start,
+                                                   probe.stop()))
+            cache.put(key, cell)
+            run.executed += 1
+
+
+def _kernel_pid(manager):
+    # jupyter_client 7 keeps the kernel process in a provisioner, earlier
+    # versions on the manager itself.
+    provisioner = getattr(manager, 'provisioner', None)
+    if provisioner is not None:
+        return getattr(provisioner, 'pid', None)
+    kernel = getattr(manager, 'kernel', None)
+    return getattr(kernel, 'pid', None)
+
+
+def sync_stage(book, stage):
+    """Copy the files of `book` that Sphinx needs into `stage`, leaving unchanged files alone.
+
+    The copy of `_config.yml` has notebook execution turned off, since the
+    notebooks written into `stage` have already been run.
+    """
+    wanted = set()
+    for directory, subdirectories, files in os.walk(book):
+        subdirectories[:] = [name for name in subdirectories if name not in NOT_STAGED]
+        for name in files:
+            relative = os.path.relpath(os.path.join(directory, name), book)
+            wanted.add(relative)
+            if name.endswith('.ipynb') or relative == '_config.yml':
+                continue
+            source, target = os.path.join(book, relative), os.path.join(stage, relative)
+            if not _same_file(source, target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(source, target)
+    config = _book_config(book)
+    config.setdefault('execute', {})['execute_notebooks'] = 'off'
+    _write_if_changed(os.path.join(stage, '_config.yml'), yaml.safe_dump(config, sort_keys=False))
+    for directory, _, files in os.walk(stage, topdown=False):
+        for name in files:
+            relative = os.path.relpath(os.path.join(directory, name), stage)
+            if relative not in wanted:
+                os.remove(os.path.join(directory, name))
+
+
+def _book_config(book):
+    with open(os.path.join(book, '_config.yml')) as file:
+        return yaml.safe_load(file) or {}
+
+
+def write_reports(book, runs):
+    """Write the traceback of each notebook that failed to `_build/html/reports/<notebook>.log`."""
+    reports = os.path.join(book, REPORTS_DIR)
+    for path, run in runs:
+        report = os.path.join(reports, os.path.splitext(path)[0] + '.log')
+        if run.error:
+            os.makedirs(os.path.dirname(report), exist_ok=True)
+            with open(report, 'w') as file:
+                file.write(run.error)
+        elif os.path.exists(report):
+            os.remove(report)
+
+
+def _same_file(source, target):
+    try:
+        a, b = os.stat(source), os.stat(target)
+    except FileNotFoundError:
+        return False
+    return a.st_size == b.st_size and a.st_mtime_ns == b.st_mtime_ns
+
+
+def _write_if_changed(path, text):
+    # Rewriting a file that hasn't changed would make Sphinx read it again.
+    try:
+        with open(path, encoding='utf-8') as file:
+            if file.read() == text:
+                return
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('book', nargs='?', default=BOOK_DIR)
+    parser.add_argument('--force', action='store_true', help='run every cell, ignoring the cache')
+    parser.add_argument('--cache', help='cell cache directory (default: %s)' % CACHE_DIR)
+    parser.add_argument('--timeout', type=int, help='seconds each cell may take (default: no limit)')
+    parser.add_argument('--no-render', dest='render', action='store_false',
+                        help='execute the notebooks but skip jb build')
+    parser.add_argument('--workers', type=int,
+                        help='notebooks to run at once (default: one per notebook, up to the number of CPUs)')
+    parser.add_argument('--profile', action='store_true',
+                        help='run every cell and write its time, memory and input to %s' % REPORTS_DIR)
+    parser.add_argument('--baseline', default=None,
+                        help='profile to compare with (default: %s in the book)' % PROFILE_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='save this profile as the baseline')
+    parser.add_argument('--threshold', type=float, metavar='PERCENT',
+                        help='fail if a cell takes this much more time or memory than in the baseline')
+    args = parser.parse_args(argv)
+    if (args.threshold is not None or args.save_baseline) and not args.profile:
+        parser.error('--threshold and --save-baseline need --profile')
+
+    result = build(args.book, args.cache, args.force, args.timeout, args.render, args.workers, args.profile)
+    slowest = max(result['notebooks'], key=lambda item: item[1].seconds, default=(None, None))[0]
+    print('%-28s %8s %8s %9s' % ('notebook', 'executed', 'reused', 'seconds'))
+    for path, run in result['notebooks']:
+        notes = ['slowest'] if path == slowest and len(result['notebooks']) > 1 else []
+        if run.error:
+            notes.append('failed, see _build/html/reports')
+        print('%-28s %8d %8d %9.2f%s' % (path, run.executed, run.reused, run.seconds,
+                                         '  ' + ', '.join(notes) if notes else ''))
+    print('%-28s %27.2f' % ('executing (wall clock)', result['execute']))
+    print('%-28s %27.2f' % ('rendering', result['render']))
+    print('%-28s %27.2f' % ('total', result['total']))
+    if args.profile:
+        _check_profile(args, [record for _, run in result['notebooks'] for record in run.profile])
+
+
+def _check_profile(args, records):
+    print('Cell profile: %s' % os.path.join(args.book, REPORTS_DIR, 'profile.html'))
+    baseline = args.baseline or os.path.join(args.book, PROFILE_BASELINE)
+    if args.threshold is not None:
+        if not os.path.exists(baseline):
+            sys.exit('no baseline profile at %s, make one with --save-baseline' % baseline)
+        found = regressions(records, load_profile(baseline), args.threshold)
+        for record, metric, before, after in found:
+            print('%s cell %d (%s): %s went from %.4g to %.4g' % (record['notebook'], record['cell'],
+                                                                   record['source'], metric, before, after))
+        if found:
+            sys.exit('%d cells are more than %g%% worse than the baseline' % (len(found), args.threshold))
+    if args.save_baseline:
+        save_profile(records, baseline)
+        print('Saved the baseline profile to %s' % baseline)
+
+
+if __name__ == '__main__':
+    main()
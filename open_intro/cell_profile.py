@@ -0,0 +1,203 @@
+"""Time, memory and input of every notebook cell, and a report of them.
+
+`python -m open_intro.build --profile` runs every cell of the book (the
+cell cache is ignored, since a cached cell costs nothing) and records for
+each one:
+
+- the wall-clock time it took,
+- how far the kernel's memory rose above where it was when the cell
+  started, at its peak (Linux resets the peak with `/proc/<pid>/clear_refs`
+  before each cell),
+- the bytes the kernel read while it ran, from `/proc/<pid>/io`, which
+  counts files and network downloads alike.
+
+Memory and bytes read are read from `/proc` and are left empty on systems
+without it. The records are written to `_build/html/reports/profile.json`,
+and to `profile.html` next to it as a table that sorts by any column.
+
+With `--threshold PERCENT` the build fails if a cell takes more time or
+memory than in the baseline (`benchmarks/results/notebook_profile.json`,
+written with `--save-baseline`) by more than that percentage. Cells are
+matched by notebook and source, and cells too small to time reliably are
+left out (`MIN_SECONDS`, `MIN_MEMORY`). Timings are steadier with
+`--workers 1`, so that the notebooks don't compete for the CPU. Times
+depend on the machine, so the baseline isn't kept in the repository.
+
+    python -m open_intro.build --profile --workers 1 --save-baseline
+    python -m open_intro.build --profile --workers 1 --threshold 25
+"""
+
+import hashlib
+import json
+import os
+from html import escape
+
+PROFILE_BASELINE = os.path.join('benchmarks', 'results', 'notebook_profile.json')
+# Below these, differences between runs are mostly noise.
+MIN_SECONDS = 0.1
+MIN_MEMORY = 16 << 20
+
+
+class KernelProbe:
+    """Memory and input counters of a kernel process, read around each cell."""
+
+    def __init__(self, pid):
+        self._proc = '/proc/%d' % pid if pid and os.path.isdir('/proc/%d' % pid) else None
+        self._start = None
+
+    def start(self):
+        if not self._proc:
+            return
+        try:
+            with open(os.path.join(self._proc, 'clear_refs'), 'w') as file:
+                file.write('5')
+            reset = True
+        except OSError:
+            reset = False
+        status = self._status()
+        self._start = {'rss': status['VmRSS'], 'peak': status['VmHWM'], 'reset': reset,
+                       'read': self._bytes_read()}
+
+    def stop(self):
+        """Return the peak memory above the start of the cell and the bytes read since, or Nones."""
+        if not self._proc or self._start is None:
+            return {'peak_memory': None, 'bytes_read': None}
+        status = self._status()
+        if self._start['reset']:
+            peak = status['VmHWM'] - self._start['rss']
+        else:
+            # Without a reset, only a new peak for the whole process shows up.
+            peak = status['VmHWM'] - self._start['peak']
+        return {'peak_memory': max(peak, 0), 'bytes_read': self._bytes_read() - self._start['read']}
+
+    def _status(self):
+        values = {}
+        with open(os.path.join(self._proc, 'status')) as file:
+            for line in file:
+                name, _, value = line.partition(':')
+                if name in ('VmRSS', 'VmHWM'):
+                    values[name] = int(value.split()[0]) * 1024
+        return values
+
+    def _bytes_read(self):
+        with open(os.path.join(self._proc, 'io')) as file:
+            for line in file:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+        return 0
+
+
+def cell_record(notebook, index, cell, seconds, usage):
+    """Return the profile record of the code cell `cell`, the `index`th cell of `notebook`."""
+    lines = cell.source.strip().splitlines()
+    return dict({
+        'notebook': notebook, 'cell': index, 'execution_count': cell.get('execution_count'),
+        'source': lines[0][:80] if lines else '',
+        'source_sha256': hashlib.sha256(cell.source.encode('utf-8')).hexdigest(),
+        'seconds': seconds,
+    }, **usage)
+
+
+def write_report(records, directory):
+    """Write `records` to `profile.json` and `profile.html` in `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    save_profile(records, os.path.join(directory, 'profile.json'))
+    with open(os.path.join(directory, 'profile.html'), 'w') as out:
+        out.write(_REPORT_HEADER)
+        out.write('<p>%d cells, %.1f s in all</p>\n' % (len(records), sum(r['seconds'] for r in records)))
+        out.write('<table>\n<thead><tr>%s</tr></thead>\n<tbody>\n' % ''.join(
+            '<th>%s</th>' % name for name in ('notebook', 'cell', 'source', 'seconds', 'peak memory MB',
+                                              'bytes read MB')))
+        for record in sorted(records, key=lambda record: -record['seconds']):
+            out.write(_ROW % (escape(record['notebook']), record['cell'], escape(record['source']),
+                              record['seconds'], _megabytes(record['peak_memory']),
+                              _megabytes(record['bytes_read'])))
+        out.write('</tbody>\n</table>\n%s</body>\n</html>\n' % _SORT_SCRIPT)
+
+
+def save_profile(records, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(records, file, indent=1)
+
+
+def load_profile(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def regressions(records, baseline, threshold):
+    """Return `(record, metric, before, after)` for each cell more than `threshold` percent worse than `baseline`.
+
+    Time and peak memory are compared, for cells found in both, as long as
+    the new value is at least `MIN_SECONDS` or `MIN_MEMORY`.
+    """
+    before = dict(zip(_signatures(baseline), baseline))
+    found = []
+    for signature, record in zip(_signatures(records), records):
+        old = before.get(signature)
+        if old is None:
+            continue
+        for metric, floor in (('seconds', MIN_SECONDS), ('peak_memory', MIN_MEMORY)):
+            if record[metric] is None or old[metric] is None or record[metric] < floor:
+                continue
+            if record[metric] > old[metric] * (1 + threshold / 100):
+                found.append((record, metric, old[metric], record[metric]))
+    return found
+
+
+def _signatures(records):
+    # A cell is known by its notebook and source, and by how many cells
+    # with the same source come before it, so that editing one cell
+    # doesn't lose track of the others.
+    seen = {}
+    signatures = []
+    for record in records:
+        key = (record['notebook'], record['source_sha256'])
+        seen[key] = seen.get(key, 0) + 1
+        signatures.append(key + (seen[key],))
+    return signatures
+
+
+def _megabytes(value):
+    return '' if value is None else '%.1f' % (value / 1e6)
+
+
+_ROW = '<tr><td>%s</td><td>%d</td><td><code>%s</code></td><td>%.3f</td><td>%s</td><td>%s</td></tr>\n'
+
+_REPORT_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Notebook cell profile</title>
+<style type="text/css">
+    table {border-collapse:collapse}
+    th {cursor:pointer; text-align:left}
+    td, th {padding:0 1em}
+    td:nth-child(n+4) {text-align:right}
+    tbody tr:nth-child(odd) {background-color:#f0f0f0}
+</style>
+</head>
+<body>
+<h1>Notebook cell profile</h1>
+"""
+
+_SORT_SCRIPT = """<script>
+// Click a column heading to sort by it; click again to reverse.
+document.querySelectorAll('th').forEach(function (th, column) {
+    th.addEventListener('click', function () {
+        var body = th.closest('table').tBodies[0];
+        var descending = th.dataset.order !== 'descending';
+        th.dataset.order = descending ? 'descending' : 'ascending';
+        var value = function (row) {
+            var text = row.cells[column].textContent;
+            return text === '' || isNaN(text) ? text : parseFloat(text);
+        };
+        Array.from(body.rows).sort(function (a, b) {
+            var x = value(a), y = value(b);
+            return (x < y ? -1 : x > y ? 1 : 0) * (descending ? -1 : 1);
+        }).forEach(function (row) { body.appendChild(row); });
+    });
+});
+</script>
+"""
@@ -0,0 +1,178 @@
+"""Load CSV files from a columnar copy instead of parsing them every time.
+
+The workshop analyses read `data/ANOVA_data*.csv`, `ANOVA_challenge.csv`
+and `brain_injury_data.csv` with `pd.read_csv` on every run. Parsing text
+is slow, and factor columns such as `Condition`, `Prime` and `Target` come
+back as one Python string per row. `load_csv` converts each CSV once into a
+directory of `.npy` files, one per column, and loads that instead:
+
+- text columns are stored as categories: a small integer code per row plus
+  one list of the distinct values,
+- number columns keep the 64-bit types `read_csv` gives them, so that
+  arithmetic on them gives the same results (a narrower type would
+  silently overflow: `RT * 100` doesn't fit in 16 bits),
+- the `.npy` files are memory-mapped copy-on-write, so loading doesn't
+  read the data until it is used, the pages are shared between processes
+  until one of them is modified, and the frame can be modified like any
+  other without changing the copy on disk,
+- the copy remembers the size, modification time and SHA-256 of the CSV
+  it came from, and is rebuilt when the CSV changes.
+
+The copy of `data/ANOVA_data1.csv` goes in `data/.columnar/ANOVA_data1.csv/`.
+
+    from open_intro.columnar import load_csv
+
+    anova_data = load_csv('data/ANOVA_data1.csv')
+
+On copies of the workshop files scaled up to 1M rows (see
+`benchmarks/bench_columnar.py`), time to load and size in memory:
+
+    file                   read_csv           load_csv
+    ANOVA_data1.csv        0.31 s, 77 MB      1.0 ms, 17 MB
+    ANOVA_data3.csv        0.45 s, 146 MB     1.3 ms, 18 MB
+    ANOVA_challenge.csv    1.0 s, 40 MB       1.5 ms, 40 MB
+    brain_injury_data.csv  0.75 s, 86 MB      1.5 ms, 25 MB
+
+Making the columnar copy the first time takes a little longer than reading
+the CSV once.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+META = 'columns.json'
+
+
+def load_csv(path, cache_dir=None, mmap=True):
+    """Return the CSV file at `path` as a DataFrame with compact column types.
+
+    The first call converts the file into a columnar copy in `cache_dir`
+    (by default `.columnar/` next to the file), and later calls load that
+    copy, memory-mapped unless `mmap` is False, for as long as the CSV is
+    unchanged.
+    """
+    directory = columnar_path(path, cache_dir)
+    if not _up_to_date(directory, path):
+        write_columns(compact_dtypes(pd.read_csv(path)), directory, _source(path))
+    return read_columns(directory, mmap)
+
+
+def columnar_path(path, cache_dir=None):
+    """Where `load_csv` keeps the columnar copy of the CSV file at `path`."""
+    return os.path.join(cache_dir or os.path.join(os.path.dirname(path), '.columnar'),
+                        os.path.basename(path))
+
+
+def compact_dtypes(data):
+    """Return `data` with text columns as categories, and the other columns as they are."""
+    columns = {}
+    for name, column in data.items():
+        if pd.api.types.is_bool_dtype(column) or pd.api.types.is_numeric_dtype(column):
+            columns[name] = column
+        else:
+            columns[name] = column.astype('category')
+    return pd.DataFrame(columns, index=data.index)
+
+
+def write_columns(data, directory, source=None):
+    """Save each column of `data` as a `.npy` file in `directory`, replacing what was there.
+
+    Categorical columns are saved as their codes, with their categories in
+    the `columns.json` that describes the directory, along with `source`.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    partial = tempfile.mkdtemp(dir=parent)
+    columns = []
+    for i, (name, column) in enumerate(data.items()):
+        description = {'name': name, 'file': '%d.npy' % i}
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            description['categories'] = column.cat.categories.tolist()
+            description['ordered'] = bool(column.cat.ordered)
+            values = column.cat.codes.to_numpy()
+        else:
+            values = column.to_numpy()
+        np.save(os.path.join(partial, description['file']), values, allow_pickle=False)
+        columns.append(description)
+    _write_meta(partial, {'rows': len(data), 'columns': columns, 'source': source})
+    # Swap the new directory in. A reader that gets in between the two
+    # renames finds no copy and reads the CSV instead.
+    stale = None
+    if os.path.exists(directory):
+        stale = tempfile.mkdtemp(dir=parent)
+        try:
+            os.replace(directory, os.path.join(stale, 'old'))
+        except FileNotFoundError:
+            pass
+    try:
+        os.replace(partial, directory)
+    except OSError:
+        # Another process converting the same CSV swapped its copy in
+        # first, and it is as good as this one.
+        if not os.path.isdir(directory):
+            raise
+        shutil.rmtree(partial)
+    if stale:
+        shutil.rmtree(stale)
+
+
+def read_columns(directory, mmap=True):
+    """Return the DataFrame saved in `directory` by `write_columns`."""
+    with open(os.path.join(directory, META)) as file:
+        meta = json.load(file)
+    columns = {}
+    for description in meta['columns']:
+        values = np.load(os.path.join(directory, description['file']),
+                         mmap_mode='c' if mmap else None, allow_pickle=False).view(np.ndarray)
+        if 'categories' in description:
+            values = pd.Categorical.from_codes(values, description['categories'],
+                                               ordered=description['ordered'], validate=False)
+        columns[description['name']] = values
+    return pd.DataFrame(columns, index=pd.RangeIndex(meta['rows']), copy=False)
+
+
+def _source(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': _sha256(path)}
+
+
+def _up_to_date(directory, path):
+    try:
+        with open(os.path.join(directory, META)) as file:
+            meta = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return False
+    source = meta['source']
+    stat = os.stat(path)
+    if stat.st_size != source['size']:
+        return False
+    if stat.st_mtime_ns == source['mtime_ns']:
+        return True
+    # Touched but maybe not changed, e.g. by a fresh git checkout: compare
+    # the contents and remember the new time if they are the same.
+    if _sha256(path) != source['sha256']:
+        return False
+    meta['source']['mtime_ns'] = stat.st_mtime_ns
+    _write_meta(directory, meta)
+    return True
+
+
+def _write_meta(directory, meta):
+    fd, partial = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, 'w') as file:
+        json.dump(meta, file, indent=1)
+    os.replace(partial, os.path.join(directory, META))
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,115 @@
+"""Paired t-tests between every pair of cells of a within-subjects design.
+
+To follow up the factorial ANOVA, the pandas workshop picks out each cell
+with a boolean mask such as `(factorial_anova_data['Prime']=='Positive') &
+(factorial_anova_data['Target']=='Positive')` and calls `stats.ttest_rel`
+on two cells at a time. Each mask scans the whole frame again, so a 4 x 4
+design, with 16 cells and 120 pairs, scans it 240 times. `paired_contrasts`
+does all the tests in one go instead:
+
+- the data are arranged once into a subjects x cells array with
+  `open_intro.anova.subject_cells`,
+- the differences for every contrast are one subtraction of two column
+  selections of that array, and their means, standard errors, t values and
+  p values are worked out for all contrasts together,
+- the p values are adjusted for multiple comparisons (Holm by default,
+  or Bonferroni or Benjamini-Hochberg) in a few array operations. These
+  give the same p values as `statsmodels.stats.multitest.multipletests`,
+  which runs the garbage collector on every call and so takes about 50 ms
+  however few p values it is given.
+
+The t values and unadjusted p values are those of `stats.ttest_rel`.
+
+    from open_intro.contrasts import paired_contrasts
+
+    paired_contrasts(factorial_anova_data, 'RT', 'Subject', ['Prime', 'Target'],
+                     [(('Positive', 'Positive'), ('Negative', 'Positive')),
+                      (('Positive', 'Negative'), ('Negative', 'Negative'))])
+
+Time for all pairs of cells (see `benchmarks/bench_contrasts.py`):
+
+    design    subjects    contrasts    masks + ttest_rel    paired_contrasts
+    2 x 2     1,000       6            23 ms                2.5 ms
+    4 x 4     1,000       120          0.99 s               8.7 ms
+    6 x 3     1,000       153          1.4 s                12 ms
+    4 x 4     10,000      120          8.2 s                72 ms
+    6 x 3     10,000      153          12 s                 81 ms
+"""
+
+from itertools import combinations, product
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from open_intro.anova import subject_cells
+
+
+def paired_contrasts(data, depvar, subject, within, contrasts=None, correction='holm', alpha=0.05):
+    """Return paired t-tests of `depvar` between pairs of cells of the `within` factors.
+
+    Each contrast is a pair of cells, and each cell a tuple with one level
+    of each factor in `within` (or just the level, for one factor). By
+    default every pair of cells is tested. The result has one row per
+    contrast, named `'Positive:Positive - Negative:Positive'`, with the mean
+    difference, its standard error, t, degrees of freedom, p, p adjusted
+    with `adjust_p` method `correction` and whether that is below `alpha`.
+    """
+    within = [within] if isinstance(within, str) else list(within)
+    cells, _, levels = subject_cells(data, depvar, subject, within)
+    cells = cells.reshape(len(cells), -1)
+    labels = list(product(*levels))
+    positions = {label: i for i, label in enumerate(labels)}
+    if contrasts is None:
+        contrasts = list(combinations(labels, 2))
+    else:
+        contrasts = [tuple(_cell(cell, len(within)) for cell in contrast) for contrast in contrasts]
+        missing = [cell for contrast in contrasts for cell in contrast if cell not in positions]
+        if missing:
+            raise KeyError('no cell %r of %s' % (missing[0], ', '.join(within)))
+    first = [positions[a] for a, _ in contrasts]
+    second = [positions[b] for _, b in contrasts]
+    results = paired_t(cells[:, first] - cells[:, second])
+    results['p_corrected'] = adjust_p(results['p'], correction)
+    results['reject'] = results['p_corrected'] < alpha
+    index = pd.Index(['%s - %s' % (':'.join(map(str, a)), ':'.join(map(str, b))) for a, b in contrasts],
+                     name='contrast')
+    return pd.DataFrame(results, index=index)
+
+
+def paired_t(differences):
+    """Paired t-tests of each column of the (subjects, contrasts) array `differences` against 0."""
+    subjects = len(differences)
+    mean = differences.mean(axis=0)
+    se = differences.std(axis=0, ddof=1) / np.sqrt(subjects)
+    t = mean / se
+    df = np.full(mean.shape, subjects - 1.0)
+    return {'mean_diff': mean, 'se': se, 't': t, 'df': df, 'p': 2 * stats.t.sf(np.abs(t), df)}
+
+
+def adjust_p(p, method='holm'):
+    """Return the p values `p` adjusted for multiple comparisons.
+
+    `method` is `'bonferroni'`, `'holm'` or `'fdr_bh'` (Benjamini-Hochberg),
+    named as in `multipletests`.
+    """
+    p = np.asarray(p, dtype=float)
+    tests = len(p)
+    if method == 'bonferroni':
+        return np.minimum(p * tests, 1)
+    order = np.argsort(p)
+    adjusted = np.empty_like(p)
+    if method == 'holm':
+        adjusted[order] = np.minimum(np.maximum.accumulate(p[order] * np.arange(tests, 0, -1)), 1)
+    elif method == 'fdr_bh':
+        scaled = p[order] * tests / np.arange(1, tests + 1)
+        adjusted[order] = np.minimum(np.minimum.accumulate(scaled[::-1])[::-1], 1)
+    else:
+        raise ValueError('unknown correction %r, use bonferroni, holm or fdr_bh' % method)
+    return adjusted
+
+
+def _cell(cell, factors):
+    if factors == 1 and not isinstance(cell, tuple):
+        return (cell,)
+    return tuple(cell)
@@ -0,0 +1,224 @@
+"""Load the workshop datasets without downloading them every time.
+
+The pandas workshop reads its data straight from GitHub with
+`pd.read_csv("https://raw.githubusercontent.com/...")`. Because the book is
+built with `execute_notebooks: force`, every build downloads and parses
+every file again, and the build fails without a network connection.
+`load_dataset` keeps a local cache instead:
+
+- each download is stored under the SHA-256 of its contents, with the
+  file's ETag and size recorded in an index next to it,
+- a cached file is used as it is for `max_age` seconds; after that it is
+  checked with a conditional request, which costs one round trip and no
+  download unless the file has changed,
+- a cached file whose size doesn't match the index is downloaded again,
+- offline, or if the download fails, the cached copy is used, or else the
+  copy in `data/` if the repository has one. The ANOVA files do, but
+  `crime_dataset.csv` doesn't, so it has to have been downloaded once,
+- the parsed DataFrame is saved as well, so later loads of the same
+  contents skip parsing the CSV. This uses Feather if `pyarrow` is
+  installed and a pickle otherwise, or for frames Feather can't store,
+  such as those read with `index_col`.
+
+The cache lives in `~/.cache/open_intro`, or in `$OPEN_INTRO_CACHE` if that
+is set. Setting `OPEN_INTRO_OFFLINE=1` never touches the network.
+
+    from open_intro.datasets import load_dataset
+
+    anova_data = load_dataset('ANOVA_data1.csv')
+    crime_data = load_dataset('https://raw.githubusercontent.com/ajstewartlang/09_glm_regression_pt1/master/data/crime_dataset.csv')
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import warnings
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:
+    FORMAT = 'pkl'
+else:
+    FORMAT = 'feather'
+
+GITHUB = 'https://raw.githubusercontent.com/ajstewartlang/'
+DATASETS = {
+    'ANOVA_data1.csv': GITHUB + '02_intro_to_python_programming/main/data/ANOVA_data1.csv',
+    'ANOVA_data3.csv': GITHUB + '02_intro_to_python_programming/main/data/ANOVA_data3.csv',
+    'crime_dataset.csv': GITHUB + '09_glm_regression_pt1/master/data/crime_dataset.csv',
+}
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+CACHE_DIR = os.environ.get('OPEN_INTRO_CACHE') or os.path.join(os.path.expanduser('~'), '.cache', 'open_intro')
+MAX_AGE = 24 * 60 * 60
+TIMEOUT = 10
+
+
+def load_dataset(name, offline=None, max_age=MAX_AGE, cache_dir=None, **read_csv_options):
+    """Return the dataset `name` as a DataFrame.
+
+    `name` is a URL or the file name of one of `DATASETS`. The file is
+    found with `fetch` and parsed with `pd.read_csv(**read_csv_options)`,
+    unless the same contents have been parsed with the same options before.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    path = fetch(DATASETS.get(name, name), offline, max_age, cache_dir)
+    key = _content_hash(path, cache_dir)
+    if read_csv_options:
+        options = json.dumps(read_csv_options, sort_keys=True, default=repr).encode('utf-8')
+        key += '-' + hashlib.sha256(options).hexdigest()[:16]
+    parsed = os.path.join(cache_dir, key)
+    if os.path.exists(parsed + '.feather'):
+        return pd.read_feather(parsed + '.feather')
+    if os.path.exists(parsed + '.pkl'):
+        return pd.read_pickle(parsed + '.pkl')
+    data = pd.read_csv(path, **read_csv_options)
+    os.makedirs(cache_dir, exist_ok=True)
+    if FORMAT == 'feather' and _feather_can_store(data):
+        with _replacing(parsed + '.feather') as partial:
+            data.to_feather(partial)
+    else:
+        with _replacing(parsed + '.pkl') as partial:
+            data.to_pickle(partial)
+    return data
+
+
+def fetch(url, offline=None, max_age=MAX_AGE, cache_dir=None):
+    """Return the path of a local copy of the file at `url`, downloading it if need be."""
+    cache_dir = cache_dir or CACHE_DIR
+    if offline is None:
+        offline = os.environ.get('OPEN_INTRO_OFFLINE') == '1'
+    index = _load_index(cache_dir)
+    entry = index.get(url)
+    path = entry and os.path.join(cache_dir, entry['sha256'] + _extension(url))
+    if entry and _size(path) != entry['size']:
+        entry = None
+    if entry and (offline or time.time() - entry['checked'] < max_age):
+        return path
+
+    if not offline:
+        try:
+            downloaded = _download(url, cache_dir, entry and entry['etag'])
+        except (urllib.error.URLError, OSError) as error:
+            warnings.warn('could not download %s (%s), using a local copy' % (url, error))
+        else:
+            # Reload the index, in case another process has added to it.
+            index = _load_index(cache_dir)
+            index[url] = downloaded or dict(entry, checked=time.time())
+            _save_index(cache_dir, index)
+            return os.path.join(cache_dir, index[url]['sha256'] + _extension(url))
+
+    if entry:
+        return path
+    bundled = os.path.join(DATA_DIR, os.path.basename(urlsplit(url).path))
+    if os.path.exists(bundled):
+        return bundled
+    raise FileNotFoundError('%s has not been downloaded and is not in %s' % (url, DATA_DIR))
+
+
+def _download(url, cache_dir, etag=None):
+    # Download `url` into the cache and return its index entry, or None if
+    # the server says the copy with `etag` is still current.
+    request = urllib.request.Request(url, headers={'If-None-Match': etag} if etag else {})
+    try:
+        response = urllib.request.urlopen(request, timeout=TIMEOUT)
+    except urllib.error.HTTPError as error:
+        if error.code == 304 and etag:
+            return None
+        raise
+    os.makedirs(cache_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    with response, tempfile.NamedTemporaryFile(dir=cache_dir, delete=False) as file:
+        for block in iter(lambda: response.read(1 << 20), b''):
+            digest.update(block)
+            file.write(block)
+            size += len(block)
+    expected = response.headers.get('Content-Length')
+    if expected is not None and int(expected) != size:
+        os.remove(file.name)
+        raise OSError('expected %s bytes but got %d' % (expected, size))
+    os.replace(file.name, os.path.join(cache_dir, digest.hexdigest() + _extension(url)))
+    return {'sha256': digest.hexdigest(), 'size': size, 'etag': response.headers.get('ETag'),
+            'checked': time.time()}
+
+
+def _extension(url):
+    return os.path.splitext(urlsplit(url).path)[1]
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def _content_hash(path, cache_dir):
+    # Files in the cache are already named after their hash.
+    name = os.path.splitext(os.path.basename(path))[0]
+    if os.path.dirname(os.path.abspath(path)) == os.path.abspath(cache_dir) and len(name) == 64:
+        return name
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'index.json')) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_index(cache_dir, index):
+    with _replacing(os.path.join(cache_dir, 'index.json')) as partial:
+        with open(partial, 'w') as file:
+            json.dump(index, file, indent=1, sort_keys=True)
+
+
+def _feather_can_store(data):
+    # Feather only keeps string column names and no index, so `index_col`
+    # or `header=None` would make `to_feather` raise.
+    return (isinstance(data.index, pd.RangeIndex) and data.index.start == 0 and data.index.step == 1
+            and data.index.name is None and all(isinstance(column, str) for column in data.columns))
+
+
+@contextmanager
+def _replacing(path):
+    # Write to a temporary file next to `path` and rename it into place, so
+    # a process reading the cache at the same time never sees half a file.
+    fd, partial = tempfile.mkstemp(dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        yield partial
+    except BaseException:
+        os.remove(partial)
+        raise
+    os.replace(partial, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('names', nargs='*', default=sorted(DATASETS),
+                        help='datasets to fetch (default: all of them)')
+    parser.add_argument('--offline', action='store_true')
+    args = parser.parse_args(argv)
+
+    for name in args.names:
+        print(fetch(DATASETS.get(name, name), offline=args.offline or None, max_age=0))
+
+
+if __name__ == '__main__':
+    main()
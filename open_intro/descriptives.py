@@ -0,0 +1,177 @@
+"""Descriptive statistics by group for CSV files too big to load.
+
+The pandas workshop reads `ANOVA_data1.csv` into memory and then calls
+`groupby(['Condition'])['RT']` with `.count()`, `.mean()` and `.std()`.
+Reaction time logs from online experiments can be tens of GB, which won't
+fit in memory. `describe_csv` gives the same table without ever holding
+more than one chunk of the file:
+
+- only the grouping columns and the value column are parsed (`usecols`),
+  with the grouping columns read as categories,
+- each chunk is reduced to a count, mean and sum of squared deviations (M2)
+  per group,
+- the per-chunk results are merged with the parallel form of Welford's
+  algorithm (Chan et al.), which adds up deviations from the running means
+  rather than raw sums of squares, so the variance stays accurate even
+  when the spread is tiny compared to the mean,
+- with `workers`, byte ranges of the file are summarised in separate
+  processes and merged the same way.
+
+Usage from the command line:
+
+    python -m open_intro.descriptives data/ANOVA_data1.csv --value RT --by Condition
+    python -m open_intro.descriptives rt_log.csv --value RT --by Condition --by Item --workers 8
+
+On a 600 MB log of 20M trials with six columns (see
+`benchmarks/bench_descriptives.py`):
+
+                            time     peak memory
+    read_csv + groupby      15 s     1,900 MB
+    describe_csv            8.2 s      385 MB
+
+The peak memory of `describe_csv` is the same for a log of 1M trials.
+"""
+
+import argparse
+import io
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from open_intro.shards import shard_file
+
+CHUNK_ROWS = 1000000
+
+
+def describe_csv(path, value, by, chunksize=CHUNK_ROWS, workers=1, dtype='float64'):
+    """Return the count, mean and standard deviation of `value` for each group of `by` in a CSV file.
+
+    The result is the same table as
+    `pd.read_csv(path).groupby(by)[value].agg(['count', 'mean', 'std'])`,
+    up to rounding, but the file is read `chunksize` rows at a time. With
+    `workers` > 1 the file is split into that many pieces per worker on line
+    boundaries and summarised in a `ProcessPoolExecutor`.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    with open(path, 'rb') as file:
+        header = file.readline()
+    columns = pd.read_csv(io.BytesIO(header)).columns.tolist()
+    start = len(header)
+    options = {
+        'names': columns, 'header': None, 'usecols': by + [value],
+        'dtype': dict({column: 'category' for column in by}, **{value: dtype}),
+        'chunksize': chunksize,
+    }
+    if workers > 1:
+        shards = [(path, max(shard_start, start), end, value, by, options)
+                  for shard_start, end in shard_file(path, workers * 4) if end > start]
+        with ProcessPoolExecutor(workers) as executor:
+            moments = list(executor.map(_shard_moments, shards))
+    else:
+        moments = [_shard_moments((path, start, None, value, by, options))]
+    return _table(reduce(combine_moments, moments, _EMPTY), by)
+
+
+def chunk_moments(chunk, value, by):
+    """Return a DataFrame of `count`, `mean` and `M2` of `value` for each group of `by` in `chunk`."""
+    summary = chunk.groupby(by, observed=True)[value].agg(['count', 'mean', 'var'])
+    summary['M2'] = (summary.pop('var') * (summary['count'] - 1)).fillna(0.0)
+    # A group whose values are all missing has a count of 0 and no mean.
+    summary['mean'] = summary['mean'].fillna(0.0)
+    # Group values as plain objects, so the same group in two chunks with
+    # different categories lines up when they are combined.
+    summary.index = _plain_index(summary.index)
+    return summary
+
+
+def combine_moments(a, b):
+    """Merge two `chunk_moments` tables into the moments of all the rows they summarise."""
+    if a.empty:
+        return b
+    if b.empty:
+        return a
+    a, b = a.align(b, join='outer', fill_value=0)
+    count = a['count'] + b['count']
+    delta = b['mean'] - a['mean']
+    share = b['count'] / count.where(count > 0, 1)
+    return pd.DataFrame({
+        'count': count,
+        'mean': a['mean'] + delta * share,
+        'M2': a['M2'] + b['M2'] + delta ** 2 * a['count'] * share,
+    })
+
+
+_EMPTY = pd.DataFrame({'count': [], 'mean': [], 'M2': []})
+
+
+def _shard_moments(args):
+    path, start, end, value, by, options = args
+    with open(path, 'rb') as file:
+        file.seek(start)
+        source = file if end is None else io.BufferedReader(_Range(file, end - start))
+        return reduce(combine_moments,
+                      (chunk_moments(chunk, value, by) for chunk in pd.read_csv(source, **options)),
+                      _EMPTY)
+
+
+class _Range(io.RawIOBase):
+    """The next `size` bytes of a binary file, as a file of their own."""
+
+    def __init__(self, file, size):
+        self._file = file
+        self._left = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        view = memoryview(buffer)[:self._left]
+        read = self._file.readinto(view)
+        self._left -= read
+        return read
+
+
+def _plain_index(index):
+    if isinstance(index, pd.MultiIndex):
+        return pd.MultiIndex.from_tuples(index.tolist(), names=index.names)
+    return pd.Index(index.tolist(), name=index.name)
+
+
+def _table(moments, by):
+    count = moments['count'].astype('int64')
+    std = np.sqrt(moments['M2'] / (count - 1).where(count > 1))
+    mean = moments['mean'].where(count > 0)
+    table = pd.DataFrame({'count': count, 'mean': mean, 'std': std})
+    # read_csv always reads categories as strings, so turn numeric groups
+    # such as subject numbers back into numbers before sorting.
+    levels = [_numeric(table.index.get_level_values(i)) for i in range(len(by))]
+    table.index = pd.MultiIndex.from_arrays(levels, names=by) if len(by) > 1 else levels[0].rename(by[0])
+    return table.sort_index()
+
+
+def _numeric(values):
+    try:
+        return pd.Index(pd.to_numeric(values))
+    except (ValueError, TypeError):
+        return values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--value', required=True, help='column to describe, e.g. RT')
+    parser.add_argument('--by', action='append', required=True,
+                        help='column to group by (repeatable), e.g. Condition')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS,
+                        help='rows to read at a time (default: %d)' % CHUNK_ROWS)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes to read the file with (default: 1)')
+    args = parser.parse_args(argv)
+
+    print(describe_csv(args.path, args.value, args.by, args.chunksize, args.workers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,658 @@
+"""Side-by-side HTML differences for large text files.
+
+This is the Problem 1 script from the "Automate the Boring Stuff" workshop,
+rewritten for documents with tens of thousands of lines. The workshop uses
+`difflib.HtmlDiff().make_file`, which works out the differences with
+`difflib.ndiff`. That compares every line of a changed block with every
+other one looking for similar pairs, so it gets very slow on big files. Here:
+
+- every line is interned to an int, so lines are compared with one integer
+  comparison rather than a string comparison,
+- the common start and end of the files are skipped straight away,
+- lines that occur exactly once in both files anchor a patience diff,
+- Myers' O(ND) algorithm fills in the gaps between anchors.
+
+The result is a list of opcodes in the same `(tag, i1, i2, j1, j2)` format as
+`difflib.SequenceMatcher.get_opcodes`, which `HtmlDiff` then renders into the
+same HTML table as `difflib.HtmlDiff`. The only difference is that changed
+lines are paired up in order within a changed block, where `ndiff` searches
+the block for the most similar pair.
+
+`diff_files` streams the table straight to the output file. With
+`--context N` it only shows the changed lines and N lines either side, like
+`make_table(context=True)`.
+
+Given two directories, `diff_trees` pairs up the files by relative path,
+skips the pairs whose contents hash the same and diffs the rest in a pool of
+worker processes, with an `index.html` linking to each diff.
+
+Usage from the command line:
+
+    python -m open_intro.diff data/file1 data/file2
+    python -m open_intro.diff data/file1 data/file2 --context 3
+    python -m open_intro.diff release1/ release2/ -o release_diff/
+
+Time to make the HTML for two versions of a document with ~1% of lines
+edited, some of them whole redrafted paragraphs (see `benchmarks/bench_diff.py`):
+
+    lines     difflib.HtmlDiff    open_intro.diff.HtmlDiff
+    1k        0.50 s              0.03 s
+    10k       1.5 s               0.26 s
+    100k      16 s                3.0 s
+
+Two releases of a tree of 400 files of 5k lines, 5% of the files edited
+(see `benchmarks/bench_diff_trees.py`), take 44 s with `diff_files` run on
+every pair and 5.3 s with `diff_trees` on a single worker.
+"""
+
+import argparse
+import difflib
+import os
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b
+from html import escape
+from io import StringIO
+from itertools import islice
+from urllib.parse import quote
+
+# Past this many edits between two anchors we stop looking for matching lines
+# and show the whole region as changed, rather than spend O(ND) time on it.
+MAX_EDITS = 2000
+# Changed lines at least this similar are shown side by side with the
+# changed characters highlighted, as `difflib.ndiff` does.
+SIMILAR_LINE_RATIO = 0.75
+# The subdirectory of `diff_trees`' output that holds the diff of each file.
+DIFFS_DIR = 'files'
+
+
+def intern_lines(fromlines, tolines):
+    """Return `fromlines` and `tolines` as lists of ints, equal ints for equal lines."""
+    ids = {}
+    a = [ids.setdefault(line, len(ids)) for line in fromlines]
+    b = [ids.setdefault(line, len(ids)) for line in tolines]
+    return a, b
+
+
+def get_matching_blocks(a, b, max_edits=MAX_EDITS):
+    """Return the matching blocks of the int sequences `a` and `b`.
+
+    Like `difflib.SequenceMatcher.get_matching_blocks`, this is a list of
+    `(i, j, n)` triples meaning `a[i:i+n] == b[j:j+n]`, in increasing order,
+    with adjacent blocks merged and a final `(len(a), len(b), 0)` sentinel.
+    """
+    blocks = []
+    # Ranges still to be diffed, and blocks found along the way, in reverse
+    # order so that popping from the end visits them first to last.
+    todo = [('range', 0, len(a), 0, len(b))]
+    while todo:
+        item = todo.pop()
+        if item[0] == 'match':
+            blocks.append(item[1:])
+            continue
+        _, alo, ahi, blo, bhi = item
+
+        start = 0
+        while alo + start < ahi and blo + start < bhi and a[alo + start] == b[blo + start]:
+            start += 1
+        if start:
+            blocks.append((alo, blo, start))
+            alo += start
+            blo += start
+        end = 0
+        while alo < ahi - end and blo < bhi - end and a[ahi - end - 1] == b[bhi - end - 1]:
+            end += 1
+        if end:
+            todo.append(('match', ahi - end, bhi - end, end))
+            ahi -= end
+            bhi -= end
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors = _unique_anchors(a, alo, ahi, b, blo, bhi)
+        if anchors:
+            stop_a, stop_b = ahi, bhi
+            for i, j in reversed(anchors):
+                todo.append(('range', i + 1, stop_a, j + 1, stop_b))
+                todo.append(('match', i, j, 1))
+                stop_a, stop_b = i, j
+            todo.append(('range', alo, stop_a, blo, stop_b))
+        else:
+            blocks.extend(_myers(a, alo, ahi, b, blo, bhi, max_edits))
+
+    merged = []
+    for i, j, n in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + n)
+        else:
+            merged.append((i, j, n))
+    merged.append((len(a), len(b), 0))
+    return merged
+
+
+def _unique_anchors(a, alo, ahi, b, blo, bhi):
+    # Lines that occur exactly once on each side, kept in the longest run
+    # that is in the same order on both sides (patience sorting).
+    counts = {}
+    for i in range(alo, ahi):
+        line = a[i]
+        counts[line] = counts.get(line, 0) + 1
+    unique_b = {}
+    for j in range(blo, bhi):
+        line = b[j]
+        if counts.get(line) == 1:
+            unique_b[line] = None if line in unique_b else j
+    pairs = [(i, unique_b[a[i]]) for i in range(alo, ahi)
+             if counts[a[i]] == 1 and unique_b.get(a[i]) is not None]
+    if not pairs:
+        return []
+
+    tails = []
+    tail_index = []
+    previous = [None] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        pile = bisect_left(tails, j)
+        if pile:
+            previous[index] = tail_index[pile - 1]
+        if pile == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[pile] = j
+            tail_index[pile] = index
+    anchors = []
+    index = tail_index[-1]
+    while index is not None:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _myers(a, alo, ahi, b, blo, bhi, max_edits):
+    # Myers' greedy shortest edit script, keeping the furthest reaching
+    # x for each diagonal after every round so the path can be traced back.
+    n = ahi - alo
+    m = bhi - blo
+    limit = min(n + m, max_edits)
+    offset = limit + 1
+    v = [0] * (2 * limit + 3)
+    trace = []
+    for d in range(limit + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_blocks(trace, d, n, m, alo, blo)
+        trace.append(v[offset - d:offset + d + 1])
+    return []
+
+
+def _myers_blocks(trace, edits, x, y, alo, blo):
+    blocks = []
+    for d in range(edits, 0, -1):
+        before = trace[d - 1]
+        k = x - y
+        if k == -d or (k != d and before[k - 1 + d - 1] < before[k + 1 + d - 1]):
+            previous_k = k + 1
+            start = before[previous_k + d - 1]
+        else:
+            previous_k = k - 1
+            start = before[previous_k + d - 1] + 1
+        if x > start:
+            blocks.append((alo + start, blo + start - k, x - start))
+        x = before[previous_k + d - 1]
+        y = x - previous_k
+    if x:
+        blocks.append((alo, blo, x))
+    blocks.reverse()
+    return blocks
+
+
+def get_opcodes(fromlines, tolines, max_edits=MAX_EDITS):
+    """Return the opcodes turning `fromlines` into `tolines`.
+
+    The opcodes are in the same format as `difflib.SequenceMatcher.get_opcodes`.
+    """
+    a, b = intern_lines(fromlines, tolines)
+    opcodes = []
+    i = j = 0
+    for ai, bj, size in get_matching_blocks(a, b, max_edits):
+        if i < ai and j < bj:
+            opcodes.append(('replace', i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(('delete', i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(('insert', i, ai, j, bj))
+        if size:
+            opcodes.append(('equal', ai, ai + size, bj, bj + size))
+        i, j = ai + size, bj + size
+    return opcodes
+
+
+def group_opcodes(opcodes, context=3):
+    """Split `opcodes` into groups of changes with `context` lines around them.
+
+    Works like `difflib.SequenceMatcher.get_grouped_opcodes`, except that
+    identical inputs give no groups at all.
+    """
+    codes = list(opcodes)
+    if not any(tag != 'equal' for tag, *_ in codes):
+        return
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == 'equal' and i2 - i1 > context * 2:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        yield group
+
+
+def mdiff(fromlines, tolines, opcodes, context=None):
+    """Yield side-by-side rows in the format of `difflib._mdiff` for `opcodes`.
+
+    Each row is `((from_number, from_text), (to_number, to_text), changed)`,
+    with changes marked up by `\\0+`, `\\0-`, `\\0^` and `\\1`. With `context`,
+    only the changed lines and `context` lines either side of them are
+    yielded, with a `(None, None, None)` row before each group that does not
+    start at the top of the files.
+
+    `fromlines` and `tolines` can be any iterables, such as open files: they
+    are read once, front to back, and only the lines in the current row are
+    kept.
+    """
+    fromlines, tolines = _Lines(fromlines), _Lines(tolines)
+    if context is None:
+        for opcode in opcodes:
+            yield from _opcode_rows(fromlines, tolines, *opcode)
+        return
+    for group in group_opcodes(opcodes, context):
+        _, i1, _, j1, _ = group[0]
+        if i1 or j1:
+            yield None, None, None
+        for opcode in group:
+            yield from _opcode_rows(fromlines, tolines, *opcode)
+
+
+class _Lines:
+    """Read lines `start` to `stop` from an iterable that only goes forwards."""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._position = 0
+
+    def read(self, start, stop):
+        for _ in range(start - self._position):
+            next(self._lines)
+        for self._position in range(start + 1, stop + 1):
+            yield next(self._lines)
+
+
+def _opcode_rows(fromlines, tolines, tag, i1, i2, j1, j2):
+    fromrange = zip(range(i1 + 1, i2 + 1), fromlines.read(i1, i2))
+    torange = zip(range(j1 + 1, j2 + 1), tolines.read(j1, j2))
+    if tag == 'equal':
+        for (i, fromline), (j, toline) in zip(fromrange, torange):
+            yield (i, fromline), (j, toline), False
+        return
+    paired = min(i2 - i1, j2 - j1)
+    for (i, fromline), (j, toline) in zip(islice(fromrange, paired), islice(torange, paired)):
+        fromtext, totext = _mark_changes(fromline, toline)
+        yield (i, fromtext), (j, totext), True
+    for i, fromline in fromrange:
+        yield (i, _mark_line('-', fromline)), ('', '\n'), True
+    for j, toline in torange:
+        yield ('', '\n'), (j, _mark_line('+', toline)), True
+
+
+def _mark_line(key, line):
+    # An empty line gets a space so that there is something to highlight.
+    return '\0' + key + (line or ' ') + '\1'
+
+
+def _mark_changes(fromline, toline):
+    matcher = difflib.SequenceMatcher(difflib.IS_CHARACTER_JUNK, fromline, toline)
+    if (matcher.real_quick_ratio() < SIMILAR_LINE_RATIO
+            or matcher.quick_ratio() < SIMILAR_LINE_RATIO
+            or matcher.ratio() < SIMILAR_LINE_RATIO):
+        return _mark_line('-', fromline), _mark_line('+', toline)
+    fromparts, toparts = [], []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            fromparts.append(fromline[i1:i2])
+            toparts.append(toline[j1:j2])
+            continue
+        if i2 > i1:
+            fromparts.append(('\0^' if tag == 'replace' else '\0-') + fromline[i1:i2] + '\1')
+        if j2 > j1:
+            toparts.append(('\0^' if tag == 'replace' else '\0+') + toline[j1:j2] + '\1')
+    return ''.join(fromparts), ''.join(toparts)
+
+
+class HtmlDiff(difflib.HtmlDiff):
+    """`difflib.HtmlDiff` with the differences worked out by `get_opcodes`.
+
+    The tables and files it makes have the same layout and styles as those
+    from `difflib.HtmlDiff`, so it can be swapped in for it directly.
+    """
+
+    def __init__(self, tabsize=8, wrapcolumn=None, max_edits=MAX_EDITS):
+        super().__init__(tabsize, wrapcolumn)
+        self._max_edits = max_edits
+
+    def _expand_line(self, line):
+        # Only lines with tabs in need the full treatment from difflib.
+        if '\t' not in line:
+            return line.rstrip('\n')
+        return super()._tab_newline_replace([line], [])[0][0]
+
+    def _tab_newline_replace(self, fromlines, tolines):
+        return [self._expand_line(line) for line in fromlines], \
+               [self._expand_line(line) for line in tolines]
+
+    def make_table(self, fromlines, tolines, fromdesc='', todesc='', context=False,
+                   numlines=5):
+        """Returns HTML table of side by side comparison with change highlights
+
+        Takes the same arguments as `difflib.HtmlDiff.make_table`.
+        """
+        table = StringIO()
+        self._write_table(table, fromlines, tolines, fromdesc, todesc, context, numlines)
+        return table.getvalue()
+
+    def write_file(self, file, fromlines, tolines, fromdesc='', todesc='', context=False,
+                   numlines=5, *, charset='utf-8', opcodes=None):
+        """Write the HTML file that `make_file` returns to `file`, one row at a time.
+
+        Only the rows waiting for a "next" anchor (`numlines` of them) are
+        held in memory, rather than the whole table. With `context=True` only
+        the changed lines and `numlines` lines around them are written, so
+        the size of the output depends on the number of changes, not on the
+        length of the files.
+
+        Given the `opcodes` for the two files, `fromlines` and `tolines` can be
+        any iterables of lines, such as the open files themselves. `file`
+        should be opened with `errors='xmlcharrefreplace'` to match
+        `make_file` for characters that `charset` cannot encode.
+        """
+        head, tail = (self._file_template % dict(
+            styles=self._styles,
+            legend=self._legend,
+            table='\0table\0',
+            charset=charset)).split('\0table\0')
+        file.write(head)
+        self._write_table(file, fromlines, tolines, fromdesc, todesc, context, numlines, opcodes)
+        file.write(tail)
+
+    def _write_table(self, file, fromlines, tolines, fromdesc, todesc, context, numlines,
+                     opcodes=None):
+        self._make_prefix()
+        if opcodes is None:
+            fromlines, tolines = self._tab_newline_replace(fromlines, tolines)
+            opcodes = get_opcodes(fromlines, tolines, self._max_edits)
+        else:
+            fromlines = map(self._expand_line, fromlines)
+            tolines = map(self._expand_line, tolines)
+        diffs = mdiff(fromlines, tolines, opcodes, numlines if context else None)
+        if self._wrapcolumn:
+            diffs = self._line_wrapper(diffs)
+
+        if fromdesc or todesc:
+            header_row = '<thead><tr>%s%s%s%s</tr></thead>' % (
+                '<th class="diff_next"><br /></th>',
+                '<th colspan="2" class="diff_header">%s</th>' % fromdesc,
+                '<th class="diff_next"><br /></th>',
+                '<th colspan="2" class="diff_header">%s</th>' % todesc)
+        else:
+            header_row = ''
+        head, tail = (self._table_template % dict(
+            data_rows='\0rows\0',
+            header_row=header_row,
+            prefix=self._prefix[1])).split('\0rows\0')
+        file.write(_markup(head))
+        changes = sum(tag != 'equal' for tag, *_ in opcodes)
+        self._write_rows(file, diffs, changes, context, numlines)
+        file.write(_markup(tail))
+
+    def _write_rows(self, file, diffs, changes, context, numlines):
+        # The same rows, "next" links and anchors as difflib's make_table and
+        # _convert_flags, worked out as we go. Knowing the number of changes
+        # up front tells us which change gets the link back to the top; the
+        # anchor for a change goes `numlines` rows before it, so that many
+        # rows are held back before being written.
+        toprefix = self._prefix[1]
+        fmt = '            <tr><td class="diff_next"%s>%s</td>%s' + \
+              '<td class="diff_next">%s</td>%s</tr>\n'
+        pending = deque()
+        count = 0
+        in_change = False
+        index = -1
+        for index, (fromdata, todata, flag) in enumerate(diffs):
+            if flag is None:
+                row = [index, '', '', None, None]
+            else:
+                row = [index, '', '', self._format_line(0, flag, *fromdata),
+                       self._format_line(1, flag, *todata)]
+            if flag:
+                if not in_change:
+                    in_change = True
+                    anchor = max(0, index - numlines)
+                    target = row if anchor == index else pending[anchor - pending[0][0]]
+                    target[1] = ' id="difflib_chg_%s_%d"' % (toprefix, count)
+                    count += 1
+                    if count == changes:
+                        row[2] = '<a href="#difflib_chg_%s_top">t</a>' % toprefix
+                    else:
+                        row[2] = '<a href="#difflib_chg_%s_%d">n</a>' % (toprefix, count)
+            else:
+                in_change = False
+                if index == 0:
+                    row[2] = '<a href="#difflib_chg_%s_%s">%s</a>' % (
+                        (toprefix, 'top', 't') if not changes else (toprefix, 0, 'f'))
+            pending.append(row)
+            while len(pending) > numlines:
+                file.write(_format_row(fmt, pending.popleft()))
+        while pending:
+            file.write(_format_row(fmt, pending.popleft()))
+        if index < 0:
+            cell = '<td></td><td>&nbsp;%s&nbsp;</td>' % (
+                'No Differences Found' if context else 'Empty File')
+            file.write(_format_row(fmt, [0, '', '<a href="#difflib_chg_%s_top">t</a>' % toprefix,
+                                         cell, cell]))
+
+
+def _format_row(fmt, row):
+    index, next_id, next_href, fromcell, tocell = row
+    if fromcell is None:
+        # A break between groups of changes, except before the first one.
+        return '        </tbody>        \n        <tbody>\n' if index else ''
+    return _markup(fmt % (next_id, next_href, fromcell, next_href, tocell))
+
+
+def _markup(text):
+    return text.replace('\0+', '<span class="diff_add">'). \
+                replace('\0-', '<span class="diff_sub">'). \
+                replace('\0^', '<span class="diff_chg">'). \
+                replace('\1', '</span>'). \
+                replace('\t', '&nbsp;')
+
+
+def diff_path(file1, file2, directory='data'):
+    """Where the workshop script writes the diff of `file1` and `file2`."""
+    return os.path.join(directory, os.path.basename(file1) + '_' + os.path.basename(file2) + '_diff.html')
+
+
+def diff_files(file1, file2, path=None, context=False, numlines=5):
+    """Write the HTML diff of `file1` and `file2` to `path` and return `path`.
+
+    The files are read twice rather than held in memory: once to work out
+    the differences from a digest of each line, and once to write the rows.
+    """
+    differ = HtmlDiff()
+    opcodes = get_opcodes(_line_digests(file1, differ), _line_digests(file2, differ),
+                          differ._max_edits)
+    path = path or diff_path(file1, file2)
+    with open(file1) as fromfile, open(file2) as tofile, \
+            open(path, 'w', encoding='utf-8', errors='xmlcharrefreplace') as out:
+        differ.write_file(out, fromfile, tofile, file1, file2, context, numlines, opcodes=opcodes)
+    return path
+
+
+def _line_digests(path, differ):
+    with open(path) as file:
+        for line in file:
+            yield blake2b(differ._expand_line(line).encode('utf-8', 'surrogatepass'),
+                          digest_size=16).digest()
+
+
+def diff_trees(dir1, dir2, output, workers=None, context=False, numlines=5):
+    """Diff every file in the directory `dir1` against the same file in `dir2`.
+
+    Files are paired by their path relative to each directory. A pair is only
+    diffed if the two files differ in size or in a hash of their contents;
+    the rest are marked unchanged without reading a line. The changed pairs
+    are diffed in a `ProcessPoolExecutor`, each to its own HTML file under
+    `output/files/`, and `output/index.html` links to all of them. Keeping
+    the diffs in their own directory means no file in the trees, such as
+    one called `index`, can have its diff overwritten by the index.
+
+    Returns a list of `(relative path, status, diff path)` sorted by path,
+    where status is one of 'changed', 'unchanged', 'added', 'removed' or
+    'binary', and diff path is None unless the status is 'changed'.
+    """
+    files1 = set(_relative_files(dir1))
+    files2 = set(_relative_files(dir2))
+    results = [(name, 'removed', None) for name in files1 - files2]
+    results += [(name, 'added', None) for name in files2 - files1]
+    tasks = []
+    for name in files1 & files2:
+        file1, file2 = os.path.join(dir1, name), os.path.join(dir2, name)
+        path = os.path.join(output, DIFFS_DIR, name + '.html')
+        tasks.append((name, file1, file2, path, context, numlines))
+
+    os.makedirs(output, exist_ok=True)
+    with ProcessPoolExecutor(workers or os.cpu_count()) as executor:
+        # The hashing happens in the workers too, so reading the unchanged
+        # files is spread over the pool as well as diffing the changed ones.
+        results += executor.map(_diff_pair, tasks, chunksize=max(1, len(tasks) // 256))
+    results.sort()
+    write_index(os.path.join(output, 'index.html'), results, output, dir1, dir2)
+    return results
+
+
+def _relative_files(directory):
+    for root, _, names in os.walk(directory):
+        for name in names:
+            yield os.path.relpath(os.path.join(root, name), directory)
+
+
+def _diff_pair(args):
+    name, file1, file2, path, context, numlines = args
+    if os.path.getsize(file1) == os.path.getsize(file2) and _file_digest(file1) == _file_digest(file2):
+        return name, 'unchanged', None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        return name, 'changed', diff_files(file1, file2, path, context, numlines)
+    except UnicodeDecodeError:
+        # Not text; the second pass may have got as far as opening the output.
+        if os.path.exists(path):
+            os.remove(path)
+        return name, 'binary', None
+
+
+def _file_digest(path, chunk_size=1 << 20):
+    digest = blake2b()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(chunk_size), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def write_index(path, results, output, dir1, dir2):
+    """Write an HTML page to `path` summarising the `results` of `diff_trees`."""
+    counts = {}
+    for _, status, _ in results:
+        counts[status] = counts.get(status, 0) + 1
+    with open(path, 'w', encoding='utf-8', errors='xmlcharrefreplace') as out:
+        out.write(_INDEX_HEADER % ((escape(dir1), escape(dir2)) * 2))
+        out.write('<p>%s</p>\n' % ', '.join('%d %s' % (counts[status], status)
+                                            for status in _STATUSES if status in counts))
+        out.write('<table>\n')
+        for name, status, diff in results:
+            if status == 'unchanged':
+                continue
+            if diff:
+                link = '<a href="%s">%s</a>' % (
+                    escape(quote(os.path.relpath(diff, output).replace(os.sep, '/'))), escape(name))
+            else:
+                link = escape(name)
+            out.write('<tr class="%s"><td>%s</td><td>%s</td></tr>\n' % (status, status, link))
+        out.write('</table>\n</body>\n</html>\n')
+
+
+_STATUSES = ('changed', 'added', 'removed', 'binary', 'unchanged')
+
+_INDEX_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Differences between %s and %s</title>
+<style type="text/css">
+    table {font-family:Courier; border-collapse:collapse}
+    td {padding:0 1em}
+    .added {background-color:#aaffaa}
+    .changed {background-color:#ffff77}
+    .removed {background-color:#ffaaaa}
+    .binary {background-color:#c0c0c0}
+</style>
+</head>
+<body>
+<h1>Differences between %s and %s</h1>
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('file1', help='file, or directory to compare file by file')
+    parser.add_argument('file2')
+    parser.add_argument('-o', '--output', help='where to write the HTML (default: data/<file1>_<file2>_diff.html, '
+                                               'or <dir1>_<dir2>_diff/ for two directories)')
+    parser.add_argument('--context', type=int, metavar='N',
+                        help='only show changed lines and N lines around them')
+    parser.add_argument('--workers', type=int,
+                        help='processes to diff directories with (default: one per CPU)')
+    args = parser.parse_args(argv)
+
+    context = args.context is not None
+    numlines = 5 if args.context is None else args.context
+    if os.path.isdir(args.file1) and os.path.isdir(args.file2):
+        output = args.output or '%s_%s_diff' % (os.path.basename(os.path.normpath(args.file1)),
+                                                os.path.basename(os.path.normpath(args.file2)))
+        results = diff_trees(args.file1, args.file2, output, args.workers, context, numlines)
+        print('%d files compared, %d differ.' % (len(results),
+                                                  sum(status != 'unchanged' for _, status, _ in results)))
+        print("The index of differences can be found here:", os.path.join(output, 'index.html'))
+        return
+    path = diff_files(args.file1, args.file2, args.output, context, numlines)
+    print("The table of differences can be found here:", path)
+
+
+if __name__ == '__main__':
+    main()
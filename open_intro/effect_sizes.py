@@ -0,0 +1,94 @@
+"""Effect sizes for many two-group comparisons at once.
+
+In the Python programming workshop `cohen_d(mean1, mean2, sd)` is called
+once per row of `all_experiments` in a `for` loop. A meta-analysis compares
+thousands of pairs of groups, so here every comparison is worked out in the
+same NumPy expression instead:
+
+- `cohen_d` is the workshop function, and works on arrays as it stands, so
+  `cohen_d(*all_experiments.T)` gives the effect size of every experiment,
+- `effect_sizes` takes the means, standard deviations and sizes of both
+  groups for every comparison and returns Cohen's d with the pooled
+  standard deviation, Hedges' g and confidence intervals for both,
+- `effect_sizes_from_data` starts from the raw scores in a long-format
+  DataFrame, and gets the means, standard deviations and sizes of every
+  group with a single `groupby`.
+
+For 100k comparisons `effect_sizes` takes about 20 ms, where calling a
+scalar function in a loop takes about 0.7 s. Starting from 20 raw scores per
+group, `effect_sizes_from_data` handles 1000 experiments in about 20 ms,
+where summarising one experiment at a time takes 2 s (see
+`benchmarks/bench_effect_sizes.py`).
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import special, stats
+
+
+def cohen_d(mean1, mean2, sd):
+    """Return (mean1 - mean2) / sd, for numbers or arrays."""
+    effect_size = (np.asarray(mean1, dtype=float) - mean2) / sd
+    return effect_size
+
+
+def pooled_sd(sd1, sd2, n1, n2):
+    """Return the pooled standard deviation of two groups."""
+    sd1, sd2, n1, n2 = (np.asarray(x, dtype=float) for x in (sd1, sd2, n1, n2))
+    return np.sqrt(((n1 - 1) * sd1 ** 2 + (n2 - 1) * sd2 ** 2) / (n1 + n2 - 2))
+
+
+def hedges_correction(df):
+    """Return the exact small-sample correction J(df) that turns d into Hedges' g."""
+    df = np.asarray(df, dtype=float)
+    return np.exp(special.gammaln(df / 2) - special.gammaln((df - 1) / 2)) / np.sqrt(df / 2)
+
+
+def effect_sizes(means, sds, ns, confidence=0.95):
+    """Return Cohen's d, Hedges' g and their confidence intervals for many comparisons.
+
+    `means`, `sds` and `ns` have one row per comparison and two columns,
+    group 1 then group 2. They can be arrays of shape (comparisons, 2) or
+    DataFrames, in which case the result has the same index.
+
+    The result is a DataFrame with columns `d`, `d_low`, `d_high`, `g`,
+    `g_low` and `g_high`. d is the difference in means over the pooled
+    standard deviation, and its confidence interval uses the usual
+    large-sample standard error sqrt((n1 + n2) / (n1 n2) + d² / 2(n1 + n2)).
+    g and its interval are d and its interval times J(n1 + n2 - 2).
+    """
+    index = means.index if isinstance(means, pd.DataFrame) else None
+    means, sds, ns = (np.asarray(x, dtype=float) for x in (means, sds, ns))
+    n1, n2 = ns[:, 0], ns[:, 1]
+    d = cohen_d(means[:, 0], means[:, 1], pooled_sd(sds[:, 0], sds[:, 1], n1, n2))
+    se = np.sqrt((n1 + n2) / (n1 * n2) + d ** 2 / (2 * (n1 + n2)))
+    margin = stats.norm.ppf(0.5 + confidence / 2) * se
+    correction = hedges_correction(n1 + n2 - 2)
+    g = d * correction
+    return pd.DataFrame({
+        'd': d, 'd_low': d - margin, 'd_high': d + margin,
+        'g': g, 'g_low': g - margin * correction, 'g_high': g + margin * correction,
+    }, index=index)
+
+
+def effect_sizes_from_data(data, value, group, by=None, groups=None, confidence=0.95):
+    """Return `effect_sizes` for every comparison in the long-format DataFrame `data`.
+
+    `value` is the column of scores and `group` the column saying which
+    group each score belongs to. Each comparison is one combination of the
+    columns `by` (a name or list of names, or None for a single comparison)
+    and is between the two levels `groups` of `group`, group 1 first; by
+    default the two levels in sorted order.
+    """
+    keys = [] if by is None else [by] if isinstance(by, str) else list(by)
+    summary = data.groupby(keys + [group], observed=True, sort=True)[value].agg(['mean', 'std', 'count'])
+    if groups is None:
+        groups = summary.index.get_level_values(group).unique().sort_values()
+        if len(groups) != 2:
+            raise ValueError('%r has %d levels, pass the two to compare as groups' % (group, len(groups)))
+    columns = pd.MultiIndex.from_product([['mean', 'std', 'count'], list(groups)])
+    if keys:
+        summary = summary.unstack(group).reindex(columns=columns)
+    else:
+        summary = summary.unstack().to_frame().T.reindex(columns=columns)
+    return effect_sizes(summary['mean'], summary['std'], summary['count'], confidence)
@@ -0,0 +1,148 @@
+"""Gitignore-style rules for leaving files out of a directory walk.
+
+The workshop `tree()` skips the contents of directories whose name is in
+the list `directories_to_ignore`. That only matches exact names, so build
+output such as `__pycache__`, `node_modules` or `*.egg-info` can't be
+described. `IgnoreRules` takes patterns in the same format as a
+`.gitignore` file:
+
+- `*.pyc` or `__pycache__/` match a name anywhere below the rules' directory
+  (a trailing `/` only matches directories),
+- `/build` or `docs/_build` contain a `/`, so they only match relative to the
+  rules' directory,
+- `*`, `?` and `[abc]` match within a name and `**` matches across
+  directories,
+- `!pattern` includes again something an earlier pattern left out.
+
+All the patterns from one file are compiled into a single regular
+expression, so checking a path costs one regex match however many patterns
+there are.
+"""
+
+import os
+import re
+
+
+class IgnoreRules:
+    """The patterns from one `.gitignore` file, or given directly, for paths under `base`."""
+
+    def __init__(self, patterns, base):
+        self.base = os.fspath(base)
+        alternatives = []
+        self._negated = [None]
+        # The last pattern that matches decides, so the patterns are tried in
+        # reverse order and the first alternative that matches wins.
+        for pattern in reversed(list(patterns)):
+            parsed = _parse(pattern)
+            if parsed is None:
+                continue
+            regex, negated = parsed
+            alternatives.append('(' + regex + ')')
+            self._negated.append(negated)
+        self._regex = re.compile('|'.join(alternatives), re.DOTALL) if alternatives else None
+
+    @classmethod
+    def from_file(cls, path):
+        """Read the rules in the file at `path`, or return None if there is no such file."""
+        try:
+            with open(path, encoding='utf-8', errors='surrogateescape') as file:
+                patterns = file.read().splitlines()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return None
+        return cls(patterns, os.path.dirname(path))
+
+    def match(self, path, is_dir):
+        """Return True if `path` is ignored, False if it is included again, or None if no pattern matches.
+
+        `path` must be under `base`.
+        """
+        if self._regex is None:
+            return None
+        relative = path[len(self.base):].lstrip(os.sep)
+        if os.sep != '/':
+            relative = relative.replace(os.sep, '/')
+        match = self._regex.fullmatch(relative + '/' if is_dir else relative)
+        if match is None:
+            return None
+        return not self._negated[match.lastindex]
+
+
+def is_ignored(rules, path, is_dir):
+    """Whether `path` is ignored by the tuple `rules`, where later rules take precedence."""
+    for rule in reversed(rules):
+        ignored = rule.match(path, is_dir)
+        if ignored is not None:
+            return ignored
+    return False
+
+
+def _parse(pattern):
+    # Turn one gitignore line into `(regex, negated)`, or None for a blank
+    # line or a comment. The regex matches a `/`-separated relative path,
+    # with a trailing `/` on directories.
+    stripped = pattern.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(pattern):
+        stripped += ' '
+    pattern = stripped
+    if not pattern or pattern.startswith('#'):
+        return None
+    negated = pattern.startswith('!')
+    if negated:
+        pattern = pattern[1:]
+    directory_only = pattern.endswith('/')
+    pattern = pattern.rstrip('/')
+    if not pattern:
+        return None
+    if '/' in pattern:
+        prefix = ''
+        pattern = pattern.lstrip('/')
+    else:
+        prefix = '(?:.*/)?'
+    return prefix + _translate(pattern) + ('/' if directory_only else '/?'), negated
+
+
+def _translate(glob):
+    regex = []
+    i = 0
+    n = len(glob)
+    while i < n:
+        c = glob[i]
+        if c == '*':
+            if glob.startswith('**', i) and (i == 0 or glob[i - 1] == '/') and (i + 2 == n or glob[i + 2] == '/'):
+                if i + 2 == n:
+                    # A trailing `/**` needs something after the `/`, so that
+                    # `a/**` matches what is in `a` but not `a` itself.
+                    regex.append('.+' if i else '.*')
+                    i += 2
+                else:
+                    regex.append('(?:.*/)?')
+                    i += 3
+                continue
+            start = i
+            while i < n and glob[i] == '*':
+                i += 1
+            # A `*` that is a whole path component matches a name, which
+            # can't be empty: `logs/*` doesn't match `logs/` itself, so the
+            # directory isn't pruned and `!logs/keep.log` can still apply.
+            whole = (start == 0 or glob[start - 1] == '/') and (i == n or glob[i] == '/')
+            regex.append('[^/]+' if whole else '[^/]*')
+            continue
+        if c == '?':
+            regex.append('[^/]')
+        elif c == '[':
+            end = glob.find(']', i + 2 if glob[i + 1:i + 2] in ('!', '^', ']') else i + 1)
+            if end == -1:
+                regex.append(re.escape(c))
+            else:
+                body = glob[i + 1:end]
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                regex.append('(?!/)[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            regex.append(re.escape(glob[i]))
+        else:
+            regex.append(re.escape(c))
+        i += 1
+    return ''.join(regex)
@@ -0,0 +1,123 @@
+"""The same linear regression fitted to every group of a dataset at once.
+
+The regression section of the pandas workshop fits
+`ols('Violent_Crimes ~ Population', data=crime_data_2015).fit()` for a
+single year. Fitting the model to every year and state instead means
+thousands of fits, and picking out each group with a boolean mask and
+going through the formula parser and a statsmodels model for each one
+spends nearly all the time on everything but the least squares.
+`grouped_ols` fits every group together:
+
+- the rows are sorted by group once, so that each group is a contiguous
+  block and every per-group sum is one `np.add.reduceat`,
+- within each group the variables are centred on their means, which keeps
+  the sums of squares accurate for counts as large as a city's population,
+  and the slopes come from one batched solve of the centred cross-products,
+  a small matrix per group,
+- the residual variance, standard errors, t values and p values follow for
+  every group in the same vectorised steps.
+
+    from open_intro.regression import grouped_ols
+
+    fits = grouped_ols(crime_data, 'Violent_Crimes', 'Population', ['Year', 'State'])
+    fits.loc[(2015, 'TX')].unstack(sort=False)
+
+The result has one row per group, with the coefficient table of each term
+under the `STATS` columns of statsmodels' `summary` (`coef` is `params`
+and `std err` is `bse`), so that `.loc[group].unstack(sort=False)` is the
+table statsmodels gives for that group. The number of observations, the
+residual degrees of freedom and R squared of each fit are under `Model`.
+They agree with statsmodels to rounding error.
+
+On a synthetic copy of the crime dataset (see
+`benchmarks/bench_regression.py`), fitting `Violent_Crimes ~ Population`
+to each of its 1,353 years x states, once the file has been read:
+
+    rows          mask + ols per group    grouped_ols
+    10,000        13.3 s                  13 ms
+    100,000       13.2 s                  32 ms
+    1,000,000     skipped                 0.25 s
+    10,000,000    skipped                 4.1 s
+
+Most of the time at the larger sizes goes on numbering the groups and
+sorting the rows by them.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+STATS = ['coef', 'std err', 't', 'P>|t|']
+MODEL_STATS = ['nobs', 'df_resid', 'rsquared']
+
+
+def grouped_ols(data, endog, exog, by):
+    """Fit `endog ~ exog` with an intercept by ordinary least squares to each group of `data` by `by`.
+
+    `exog` is a column name or a list of them, and `by` a column name or a
+    list of them, as for `groupby`. Rows missing any of these values are
+    left out, as statsmodels' formulas do. Groups with no more observations
+    than coefficients, or whose regressors don't vary, get NaN where
+    statsmodels would give an unidentified fit.
+    """
+    exog = [exog] if isinstance(exog, str) else list(exog)
+    data = data.dropna(subset=[endog] + exog + ([by] if isinstance(by, str) else list(by)))
+    if not len(data):
+        raise ValueError('no rows with all of %s' % ', '.join([endog] + exog))
+    groups = data.groupby(by, sort=True, observed=True)
+    codes = groups.ngroup().to_numpy()
+    order = np.argsort(codes, kind='stable')
+    x = data[exog].to_numpy(dtype=float)[order]
+    y = data[endog].to_numpy(dtype=float)[order]
+    result = ols_arrays(x, y, codes[order])
+    columns = {}
+    for i, term in enumerate(['Intercept'] + exog):
+        for j, stat in enumerate(STATS):
+            columns[term, stat] = result['coefficients'][:, i, j]
+    for stat in MODEL_STATS:
+        columns['Model', stat] = result[stat]
+    return pd.DataFrame(columns, index=groups.size().index)
+
+
+def ols_arrays(x, y, codes):
+    """Fit `y` on `x` with an intercept separately for each run of equal `codes`, which must be sorted.
+
+    `x` has one row per observation and one column per regressor. Returns a
+    dict with `coefficients`, of shape (groups, 1 + regressors, len(STATS)),
+    and `nobs`, `df_resid` and `rsquared`, one value per group.
+    """
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    nobs = np.diff(np.r_[starts, len(codes)])
+    group = np.repeat(np.arange(len(starts)), nobs)
+    x_mean = np.add.reduceat(x, starts) / nobs[:, None]
+    y_mean = np.add.reduceat(y, starts) / nobs
+    xc = x - x_mean[group]
+    yc = y - y_mean[group]
+    # The centred cross-products of each group, a k x k matrix and a
+    # k-vector; summing the outer products row by row keeps it one pass.
+    sxx = np.add.reduceat(xc[:, :, None] * xc[:, None, :], starts)
+    sxy = np.add.reduceat(xc * yc[:, None], starts)
+    syy = np.add.reduceat(yc * yc, starts)
+
+    k = x.shape[1]
+    df_resid = nobs - k - 1
+    identified = np.linalg.matrix_rank(sxx, hermitian=True) == k
+    inverse = np.full_like(sxx, np.nan)
+    inverse[identified] = np.linalg.inv(sxx[identified])
+    slopes = np.einsum('gij,gj->gi', inverse, sxy)
+    intercept = y_mean - np.einsum('gi,gi->g', x_mean, slopes)
+    # The residuals themselves, rather than syy less the explained sum of
+    # squares, which loses digits when the fit is close.
+    residuals = yc - np.einsum('ni,ni->n', xc, slopes[group])
+    rss = np.add.reduceat(residuals * residuals, starts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.where(df_resid > 0, rss / df_resid, np.nan)
+        slope_variance = scale[:, None] * np.diagonal(inverse, axis1=1, axis2=2)
+        intercept_variance = scale * (1 / nobs + np.einsum('gi,gij,gj->g', x_mean, inverse, x_mean))
+        params = np.column_stack([intercept, slopes])
+        bse = np.sqrt(np.column_stack([intercept_variance, slope_variance]))
+        t = params / bse
+        rsquared = 1 - rss / syy
+    p = 2 * stats.t.sf(np.abs(t), df_resid[:, None])
+    return {'coefficients': np.stack([params, bse, t, p], axis=2), 'nobs': nobs,
+            'df_resid': df_resid, 'rsquared': np.where(identified, rsquared, np.nan)}
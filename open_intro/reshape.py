@@ -0,0 +1,117 @@
+"""Repeated-measures data with one column per condition, without melting it.
+
+`data/ANOVA_challenge.csv` has one row per participant and one column per
+cell of the 2 x 2 design, such as `positiveprime_positivetarget`, but
+`AnovaRM` wants one row per participant and cell. Solutions to the
+challenge `melt` the frame and then split the column names with
+`.str.split('_', expand=True)`, which makes a Python string for every row of
+every factor and copies the data several times. Here the column names are
+parsed once, and then:
+
+- `wide_to_long` builds the long frame with the factors as categories,
+  whose codes are repeated rather than parsed row by row,
+- `wide_cells` skips the long frame altogether and gives the subjects x
+  cells array that `open_intro.anova.rm_anova_arrays` works on, so
+  `rm_anova_wide` gives the `AnovaRM` table straight from the wide file.
+
+    from open_intro.reshape import rm_anova_wide, wide_to_long
+
+    challenge = pd.read_csv('data/ANOVA_challenge.csv')
+    long = wide_to_long(challenge, 'participant', ['Prime', 'Target'])
+    rm_anova_wide(challenge, 'participant', ['Prime', 'Target'])
+
+On a copy of the file with 1M participants (see
+`benchmarks/bench_reshape.py`), including reading the CSV:
+
+    method                     peak memory    time
+    read_csv only              200 MB         1.0 s
+    melt + str.split           1,480 MB       12.7 s
+    wide_to_long               300 MB         1.2 s
+    wide_to_long + rm_anova    365 MB         2.2 s
+    rm_anova_wide              310 MB         1.2 s
+"""
+
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from open_intro.anova import rm_anova_table
+
+
+def parse_cells(columns, factors, sep='_'):
+    """Return the level of each factor in `factors` named by each column in `columns`.
+
+    A column name has one part per factor, separated by `sep`, and a part
+    that ends with the factor's name (ignoring case) names the level before
+    it: `positiveprime_negativetarget` is Prime `positive`, Target
+    `negative`. The result is a DataFrame indexed by column with one
+    column per factor.
+    """
+    levels = []
+    for column in columns:
+        parts = column.split(sep)
+        if len(parts) != len(factors):
+            raise ValueError('cannot split %r into %d factors at %r' % (column, len(factors), sep))
+        levels.append([part[:-len(factor)] if part.lower().endswith(factor.lower()) and part.lower() != factor.lower()
+                       else part for part, factor in zip(parts, factors)])
+    return pd.DataFrame(levels, index=pd.Index(columns), columns=factors)
+
+
+def wide_cells(data, subject, factors, cells=None, sep='_'):
+    """Return `(cells, subjects, levels)` for a frame with one column per cell.
+
+    This is what `open_intro.anova.subject_cells` returns for the same data
+    in long format: `cells[s, i, j, ...]` is the value of subject `s` in
+    level `i` of the first factor, level `j` of the second and so on, with
+    the levels of each factor in sorted order. `cells` lists the columns to
+    use, by default all but `subject`.
+    """
+    columns, levels = _cell_columns(data, subject, factors, cells, sep)
+    order = [columns[combination] for combination in product(*levels)]
+    values = data[order].to_numpy(dtype=float)
+    return values.reshape((len(data),) + tuple(len(level) for level in levels)), data[subject].to_numpy(), levels
+
+
+def wide_to_long(data, subject, factors, cells=None, sep='_', value_name='RT'):
+    """Return `data`, which has one column per cell, with one row per subject and cell.
+
+    The long frame has the columns `subject`, one categorical column per
+    factor and `value_name`, with the rows in the order of `melt`: every
+    subject for the first cell, then every subject for the next.
+    """
+    columns, levels = _cell_columns(data, subject, factors, cells, sep)
+    combinations = list(columns)
+    # Column-major order is the order pandas keeps a block of float columns
+    # in, so ravel doesn't copy.
+    values = data[[columns[combination] for combination in combinations]].to_numpy(dtype=float)
+    long = {subject: np.tile(data[subject].to_numpy(), len(combinations))}
+    for i, factor in enumerate(factors):
+        codes = np.array([levels[i].index(combination[i]) for combination in combinations],
+                         dtype=np.min_scalar_type(len(levels[i])))
+        long[factor] = pd.Categorical.from_codes(np.repeat(codes, len(data)), levels[i])
+    long[value_name] = values.ravel(order='F')
+    return pd.DataFrame(long)
+
+
+def rm_anova_wide(data, subject, factors, cells=None, sep='_'):
+    """Return the `AnovaRM` table for a frame with one column per cell, without reshaping it."""
+    return rm_anova_table(wide_cells(data, subject, factors, cells, sep)[0], factors)
+
+
+def _cell_columns(data, subject, factors, cells, sep):
+    # Map each combination of levels to its column, and list the sorted
+    # levels of each factor.
+    if cells is None:
+        cells = [column for column in data.columns if column != subject]
+    parsed = parse_cells(cells, factors, sep)
+    levels = [sorted(parsed[factor].unique()) for factor in factors]
+    columns = {}
+    for column, combination in zip(cells, parsed.itertuples(index=False, name=None)):
+        if combination in columns:
+            raise ValueError('%r and %r are the same cell' % (columns[combination], column))
+        columns[combination] = column
+    missing = [combination for combination in product(*levels) if combination not in columns]
+    if missing:
+        raise ValueError('no column for the cell %s' % ', '.join(missing[0]))
+    return columns, levels
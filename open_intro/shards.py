@@ -0,0 +1,32 @@
+"""Split a text file into byte ranges of whole lines, to be read in parallel.
+
+Both `open_intro.emails` and `open_intro.descriptives` hand each worker
+process a range of the file to read on its own. `shard_file` picks the
+ranges by seeking to evenly spaced offsets and moving each one forward to
+the start of the next line, so finding them reads a line per shard rather
+than the whole file.
+"""
+
+import os
+
+
+def shard_file(path, shards):
+    """Split the file at `path` into at most `shards` byte ranges of whole lines.
+
+    Returns a list of `(start, end)` offsets. Every boundary sits just after
+    a newline, so no line is split between two shards.
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as file:
+        for i in range(1, shards):
+            target = size * i // shards
+            if target <= bounds[-1]:
+                continue
+            file.seek(target - 1)
+            file.readline()
+            boundary = file.tell()
+            if bounds[-1] < boundary < size:
+                bounds.append(boundary)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
@@ -0,0 +1,286 @@
+"""Print the directory tree of a large project, one line per file.
+
+This is the Problem 3 script from the "Automate the Boring Stuff" workshop,
+rewritten for shared drives holding millions of files. The workshop version
+recurses once per directory, builds a list of every directory's contents
+with `Path.iterdir()` before printing any of it, and calls `Path.is_dir()`
+on each entry, which is another `stat` call per file. Here:
+
+- the walk is a loop over an explicit stack of open directories, so a deep
+  tree can't hit Python's recursion limit,
+- each directory is read with `os.scandir`, whose entries already know
+  whether they are directories, so no file is `stat`-ed just to find out,
+- entries are printed as they are read, looking only one entry ahead to
+  know whether to draw `├──` or `└──`.
+
+The lines are exactly the ones the workshop `tree()` yields.
+
+Both `tree` and `scan_usage` take gitignore-style patterns to leave out,
+such as `__pycache__/` or `*.egg-info/`, and can follow the `.gitignore`
+files they come across (see `open_intro/ignore.py`). Ignored directories
+are skipped before they are read, which on a typical checkout is most of
+the work.
+
+`scan_usage` totals up the number of files and bytes under every directory,
+like `du`. It reads directories from a pool of threads, which helps most on
+network drives where every call waits on the server, and it can keep a cache
+keyed on each directory's modification time so that scanning again only
+re-reads the directories that have changed.
+
+Usage from the command line:
+
+    python -m open_intro.tree ~/online_teaching/online_r_units
+    python -m open_intro.tree ~/online_teaching --du --cache ~/.tree_cache.json
+    python -m open_intro.tree ~/projects/analysis --gitignore --exclude '*.csv'
+
+Time to walk a synthetic tree of 1M files in 111k directories
+(see `benchmarks/bench_tree.py`):
+
+    workshop tree()    17.7 s
+    tree()              2.7 s
+
+Time to total up a tree of 20k files in 2.2k directories with 1 ms added to
+every directory read and `stat`, as on a network drive (see
+`benchmarks/bench_tree_usage.py`):
+
+                              first scan    rescan
+    scan_usage, 1 thread      6.4 s         3.4 s
+    scan_usage, 16 threads    0.65 s        0.37 s
+
+where the rescan comes after adding a file to 1% of the directories.
+
+On a synthetic checkout of 20k source files and 500k files of dependencies,
+build output and `.git` objects (see `benchmarks/bench_tree_ignore.py`):
+
+                                  without --gitignore    with --gitignore
+    tree()                        1.15 s                 0.14 s
+    scan_usage()                  4.1 s                  0.29 s
+"""
+
+import argparse
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from queue import SimpleQueue
+
+from open_intro.ignore import IgnoreRules, is_ignored
+
+space = '    '
+branch = '│   '
+tee = '├── '
+last = '└── '
+DIRECTORIES_TO_IGNORE = ('.git', '.Rproj.user')
+
+# Each directory on the stack keeps its `scandir` handle open. Below this
+# depth the rest of a directory is read into a list instead, so a very deep
+# tree can't run out of file descriptors.
+MAX_OPEN_DIRECTORIES = 128
+
+Usage = namedtuple('Usage', 'files bytes')
+
+
+def tree(dir_path, prefix='', directories_to_ignore=DIRECTORIES_TO_IGNORE, ignore=(), gitignore=False):
+    """Yield one line of the tree drawing for each entry under `dir_path`.
+
+    The contents of the directories named in `directories_to_ignore` are
+    left out, although the directories themselves are still listed.
+
+    Files and directories matching the gitignore-style patterns `ignore` are
+    left out altogether, and with `gitignore=True` so is everything the
+    `.gitignore` files found along the way ignore. An ignored directory is
+    never read.
+    """
+    directories_to_ignore = frozenset(directories_to_ignore)
+    rules = _root_rules(dir_path, ignore, gitignore)
+    stack = [(_scan(dir_path, True, rules), prefix, rules)]
+    while stack:
+        entries, prefix, rules = stack[-1]
+        for entry, is_last in entries:
+            yield prefix + (last if is_last else tee) + entry.name
+            if entry.name not in directories_to_ignore and entry.is_dir():
+                if gitignore:
+                    rules = _add_gitignore(rules, entry.path)
+                stack.append((_scan(entry.path, len(stack) < MAX_OPEN_DIRECTORIES, rules),
+                              prefix + (space if is_last else branch), rules))
+                break
+        else:
+            stack.pop()
+
+
+def _root_rules(root, ignore, gitignore):
+    rules = (IgnoreRules(ignore, root),) if ignore else ()
+    return _add_gitignore(rules, root) if gitignore else rules
+
+
+def _add_gitignore(rules, directory):
+    found = IgnoreRules.from_file(os.path.join(directory, '.gitignore'))
+    return rules + (found,) if found else rules
+
+
+def _scan(path, keep_open, rules):
+    entries = os.scandir(path)
+    if not keep_open:
+        with entries:
+            entries = list(entries)
+    if rules:
+        # The entry types come from the directory listing, so this doesn't stat anything.
+        entries = (entry for entry in entries if not is_ignored(rules, entry.path, entry.is_dir()))
+    return _mark_last(entries)
+
+
+def _mark_last(entries):
+    # Yield `(entry, is_last)`, holding back one entry to know which is last.
+    entries = iter(entries)
+    previous = next(entries, None)
+    if previous is None:
+        return
+    for entry in entries:
+        yield previous, False
+        previous = entry
+    yield previous, True
+
+
+def scan_usage(root, workers=16, cache_path=None, directories_to_ignore=DIRECTORIES_TO_IGNORE,
+               ignore=(), gitignore=False):
+    """Return a dict mapping every directory under `root` to its total `Usage`.
+
+    Each directory is read once, in a pool of `workers` threads, and the
+    files and bytes it holds directly are added up the tree once all of its
+    subdirectories are done, so no file is looked at twice. Like `du`,
+    symbolic links are counted but not followed. The directories named in
+    `directories_to_ignore` and anything matched by `ignore` or, with
+    `gitignore=True`, by a `.gitignore` file are left out altogether.
+
+    With `cache_path`, what was found in each directory is saved to that
+    JSON file along with the directory's modification time. On the next scan
+    a directory whose modification time hasn't changed isn't read again; only
+    its subdirectories are checked. A directory's modification time changes
+    when files are added, removed or renamed in it, but not when an existing
+    file is rewritten, so a file that has grown in place is only noticed
+    once something else in its directory changes. The same goes for edits
+    to a `.gitignore` file: delete the cache to pick them up everywhere.
+    """
+    directories_to_ignore = frozenset(directories_to_ignore)
+    settings = {'directories_to_ignore': sorted(directories_to_ignore),
+                'ignore': list(ignore), 'gitignore': gitignore}
+    cache = _load_cache(cache_path, settings) if cache_path else {}
+    scanned = {}
+    order = []
+    done = SimpleQueue()
+    with ThreadPoolExecutor(workers) as executor:
+        def submit(path, rules):
+            future = executor.submit(_scan_directory, path, cache.get(path), directories_to_ignore,
+                                     rules, gitignore)
+            future.add_done_callback(lambda future: done.put((path, future)))
+
+        root = os.fspath(root)
+        submit(root, (IgnoreRules(ignore, root),) if ignore else ())
+        outstanding = 1
+        while outstanding:
+            path, future = done.get()
+            outstanding -= 1
+            record, rules = future.result()
+            scanned[path] = record
+            order.append(path)
+            for name in record[3]:
+                submit(os.path.join(path, name), rules)
+                outstanding += 1
+
+    if cache_path:
+        _save_cache(cache_path, settings,
+                    {path: record for path, record in scanned.items() if record[0] is not None})
+    # Every directory was read after its parent, so going backwards through
+    # `order` finishes each directory's subdirectories before the directory.
+    usage = {}
+    for path in reversed(order):
+        _, files, size, subdirectories = scanned[path]
+        for name in subdirectories:
+            child = usage[os.path.join(path, name)]
+            files += child.files
+            size += child.bytes
+        usage[path] = Usage(files, size)
+    return usage
+
+
+def _scan_directory(path, cached, directories_to_ignore, rules, gitignore):
+    # Return `(mtime_ns, files, bytes, subdirectories)` for the files
+    # directly in `path`, reusing `cached` if the directory is unchanged,
+    # and the ignore rules that apply to its subdirectories.
+    try:
+        if gitignore:
+            rules = _add_gitignore(rules, path)
+        mtime = os.stat(path).st_mtime_ns
+        if cached is not None and cached[0] == mtime:
+            return cached, rules
+        files = size = 0
+        subdirectories = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if rules and is_ignored(rules, entry.path, is_dir):
+                    continue
+                if is_dir:
+                    if entry.name not in directories_to_ignore:
+                        subdirectories.append(entry.name)
+                else:
+                    files += 1
+                    size += entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        # Unreadable or deleted while we were scanning: count it as empty,
+        # and leave it out of the cache so it is tried again next time.
+        return (None, 0, 0, ()), rules
+    return (mtime, files, size, subdirectories), rules
+
+
+def _load_cache(path, settings):
+    try:
+        with open(path) as file:
+            cache = json.load(file)
+    except FileNotFoundError:
+        return {}
+    # What was saved for each directory depends on what was ignored.
+    if cache['settings'] != settings:
+        return {}
+    return {directory: tuple(record) for directory, record in cache['directories'].items()}
+
+
+def _save_cache(path, settings, records):
+    # Write a new file and rename it into place, so an interrupted scan
+    # can't leave a half-written cache behind.
+    with open(path + '.tmp', 'w') as file:
+        json.dump({'settings': settings, 'directories': records}, file)
+    os.replace(path + '.tmp', path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default='.')
+    parser.add_argument('--ignore', action='append',
+                        help='directory name whose contents to leave out '
+                             '(repeatable, default: .git and .Rproj.user)')
+    parser.add_argument('--exclude', action='append', default=[], metavar='PATTERN',
+                        help='leave out anything matching this gitignore-style pattern (repeatable)')
+    parser.add_argument('--gitignore', action='store_true',
+                        help='leave out what the .gitignore files found along the way ignore')
+    parser.add_argument('--du', action='store_true',
+                        help='print the number of files and bytes under each directory instead')
+    parser.add_argument('--workers', type=int, default=16,
+                        help='threads to read directories with for --du (default: 16)')
+    parser.add_argument('--cache', metavar='FILE',
+                        help='with --du, keep a cache in FILE and only re-read changed directories')
+    args = parser.parse_args(argv)
+
+    directories_to_ignore = args.ignore or DIRECTORIES_TO_IGNORE
+    if args.du:
+        usage = scan_usage(args.path, args.workers, args.cache, directories_to_ignore,
+                           args.exclude, args.gitignore)
+        for path in sorted(usage):
+            print('%12d %9d  %s' % (usage[path].bytes, usage[path].files, path))
+        return
+    for line in tree(args.path, '', directories_to_ignore, args.exclude, args.gitignore):
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from open_intro.reshape import wide_to_long
+
+
+def test_wide_to_long_with_more_levels_than_int8_holds():
+    primes = ['p%03d' % level for level in range(130)]
+    columns = ['%sprime_%starget' % (prime, target) for prime in primes for target in ('positive', 'negative')]
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.normal(1550, 50, (3, len(columns))), columns=columns)
+    data.insert(0, 'participant', [1, 2, 3])
+
+    long = wide_to_long(data, 'participant', ['Prime', 'Target'])
+
+    expected = data.melt(id_vars='participant', var_name='cell', value_name='RT')
+    expected[['Prime', 'Target']] = expected['cell'].str.split('_', expand=True)
+    expected['Prime'] = expected['Prime'].str.removesuffix('prime')
+    expected['Target'] = expected['Target'].str.removesuffix('target')
+    assert list(long['Prime'].cat.categories) == primes
+    assert (long['Prime'].astype(str) == expected['Prime']).all()
+    assert (long['Target'].astype(str) == expected['Target']).all()
+    assert np.array_equal(long['RT'], expected['RT'])